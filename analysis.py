@@ -0,0 +1,179 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+from compact_report import read_report
+import numpy as np
+import argparse
+import json
+
+
+class Trials(NamedTuple):
+    participant: np.ndarray
+    group: np.ndarray
+    file: np.ndarray
+    hit: np.ndarray
+    relative_time: np.ndarray
+    participants: np.ndarray
+    groups: np.ndarray
+    files: np.ndarray
+
+
+def load_report(path: Path) -> dict[str, Any]:
+    report = read_report(path)
+    report.setdefault('id', Path(path).stem)
+    return report
+
+
+def load_reports(paths: list[Path],
+                 max_workers: Optional[int] = None) -> list[dict[str, Any]]:
+    if len(paths) < 2:
+        return [load_report(path) for path in paths]
+    with ProcessPoolExecutor(max_workers) as executor:
+        return list(executor.map(load_report, paths,
+                                 chunksize=max(1, len(paths) // 64)))
+
+
+def build_trials(reports: list[dict[str, Any]]) -> Trials:
+    sizes = np.array([len(report['images']) for report in reports], dtype=int)
+    participants = np.array([str(report['id']) for report in reports])
+    participant = np.repeat(np.arange(len(reports)), sizes)
+    groups, group = np.unique(np.array(
+        [image['group'] for report in reports for image in report['images']],
+        dtype=str), return_inverse=True)
+    files, file = np.unique(np.array(
+        [image['file'] for report in reports for image in report['images']],
+        dtype=str), return_inverse=True)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    clicked = np.concatenate(
+        [offset + np.asarray(report['clicked_images'], dtype=int)
+         for offset, report in zip(offsets, reports)] or [np.empty(0, int)])
+    hit = np.zeros(sizes.sum(), dtype=bool)
+    hit[clicked] = True
+    relative_time = np.full(sizes.sum(), np.nan)
+    relative_time[clicked] = np.concatenate(
+        [np.asarray(report['relative_times'], dtype=float)
+         for report in reports] or [np.empty(0)])
+    return Trials(participant, group.reshape(-1), file.reshape(-1), hit,
+                  relative_time, participants, groups, files)
+
+
+def grouped_quantile(codes: np.ndarray, values: np.ndarray, q: float,
+                     size: int) -> np.ndarray:
+    valid = ~np.isnan(values)
+    codes = codes[valid]
+    values = values[valid]
+    values = values[np.lexsort((values, codes))]
+    counts = np.bincount(codes, minlength=size)
+    starts = np.cumsum(counts) - counts
+    position = starts + q * np.maximum(counts - 1, 0)
+    low = np.floor(position).astype(int)
+    high = np.ceil(position).astype(int)
+    result = np.full(size, np.nan)
+    present = counts > 0
+    low, high, position = low[present], high[present], position[present]
+    result[present] = values[low] + (values[high] - values[low]) * \
+        (position - low)
+    return result
+
+
+def grouped_summary(codes: np.ndarray, trials: Trials,
+                    size: int) -> dict[str, np.ndarray]:
+    count = np.bincount(codes, minlength=size)
+    hits = np.bincount(codes, weights=trials.hit, minlength=size)
+    times = np.nan_to_num(trials.relative_time)
+    total = np.bincount(codes, weights=times, minlength=size)
+    squares = np.bincount(codes, weights=times ** 2, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / hits
+        std = np.sqrt(np.maximum(squares / hits - mean ** 2, 0))
+        hit_rate = hits / count
+    return {
+        'trials': count,
+        'hits': hits.astype(int),
+        'hit_rate': hit_rate,
+        'rt_mean': mean,
+        'rt_std': std,
+        'rt_p10': grouped_quantile(codes, trials.relative_time, 0.1, size),
+        'rt_median': grouped_quantile(codes, trials.relative_time, 0.5, size),
+        'rt_p90': grouped_quantile(codes, trials.relative_time, 0.9, size)
+    }
+
+
+def group_summary(trials: Trials) -> dict[str, np.ndarray]:
+    return grouped_summary(trials.group, trials, len(trials.groups))
+
+
+def participant_summary(trials: Trials) -> dict[str, np.ndarray]:
+    return grouped_summary(trials.participant, trials,
+                           len(trials.participants))
+
+
+def rt_histogram(trials: Trials,
+                 bins: np.ndarray) -> np.ndarray:
+    hit = trials.hit
+    histogram, _, _ = np.histogram2d(
+        trials.group[hit], trials.relative_time[hit],
+        bins=(np.arange(len(trials.groups) + 1), bins))
+    return histogram.astype(int)
+
+
+def to_records(labels: np.ndarray,
+               summary: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+    return [
+        {'name': str(label),
+         **{key: None if np.isnan(values[n]) else values[n].item()
+            for key, values in summary.items()}}
+        for n, label in enumerate(labels)
+    ]
+
+
+def print_table(title: str, records: list[dict[str, Any]]) -> None:
+    print(title)
+    print(f"{'name':<24}{'trials':>8}{'hits':>8}{'hit rate':>10}"
+          f"{'RT mean':>10}{'RT median':>11}{'RT p90':>10}")
+    for record in records:
+        print(f"{record['name'][:24]:<24}{record['trials']:>8}{record['hits']:>8}"
+              + ''.join(f'{value:>{width}.3f}' if value is not None else
+                        f"{'-':>{width}}"
+                        for value, width in ((record['hit_rate'], 10),
+                                             (record['rt_mean'], 10),
+                                             (record['rt_median'], 11),
+                                             (record['rt_p90'], 10))))
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Summarise saved session reports.')
+    parser.add_argument('reports', type=Path, nargs='+')
+    parser.add_argument('--bins', type=float, nargs=3,
+                        metavar=('START', 'STOP', 'STEP'),
+                        default=[0, 2, 0.1])
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--json', type=Path,
+                        help='write the summaries to this file')
+    args = parser.parse_args()
+    trials = build_trials(load_reports(args.reports, args.workers))
+    groups = to_records(trials.groups, group_summary(trials))
+    participants = to_records(trials.participants,
+                              participant_summary(trials))
+    bins = np.arange(*args.bins)
+    histogram = rt_histogram(trials, bins)
+    print_table('Groups', groups)
+    print_table('Participants', participants)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'groups': groups,
+                'participants': participants,
+                'rt_histogram': {
+                    'bins': bins.tolist(),
+                    'counts': {str(group): counts.tolist() for group, counts
+                               in zip(trials.groups, histogram)}
+                }
+            }, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
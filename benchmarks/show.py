@@ -0,0 +1,231 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+from tempfile import TemporaryDirectory
+from PIL import Image
+import subprocess
+import itertools
+import platform
+import argparse
+import resource
+import random
+import json
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+
+def make_images(dir: Path, megapixels: float, count: int) -> list[Path]:
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    files = []
+    for n in range(count):
+        file = dir / f'{megapixels}mp_{n}.jpg'
+        Image.effect_noise((width, height), 64 + n).convert('RGB').save(file)
+        files.append(file)
+    return files
+
+
+def selection_configs(files: list[Path], exhibitions: int,
+                      seed: int) -> dict[str, Any]:
+    half = len(files) // 2 or 1
+    groups = {
+        n: {
+            'name': name,
+            'rate': 1,
+            'images': {id: {'file': str(file), 'rate': 1}
+                       for id, file in enumerate(files[start:stop], start)}
+        }
+        for n, (name, start, stop) in enumerate(
+            [('a', 0, half), ('b', half, len(files))])
+        if files[start:stop]
+    }
+    return {
+        'intergroup_show_order': 'Random',
+        'intragroup_show_order': 'Random',
+        'intergroup_behaviour': 'Select a new group on each show',
+        'selection_rate_behaviour': 'Probabilistic',
+        'screen': None,
+        'allow_image_repeat': True,
+        'amount_of_exhibitions': exhibitions,
+        'seed': seed,
+        'show_time': None,
+        'interval_time': None,
+        'interaction_key': None,
+        'skip_on_click': False,
+        'groups': groups,
+        'n': len(files)
+    }
+
+
+def peak_memory() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10
+
+
+def run_case(case: dict[str, Any]) -> dict[str, Any]:
+    app = QtWidgets.QApplication([])
+    from select_images import SelectImages
+    from image_store import image_store
+    from loader import decode_frame
+    from show import ShowWindow
+
+    class BenchmarkWindow(ShowWindow):
+        def showReportBox(self) -> None:
+            pass
+
+    files = sorted(Path(case['dir']).glob(f"{case['megapixels']}mp_*.jpg"))
+    start = time.perf_counter()
+    selection = list(SelectImages(**selection_configs(
+        files, case['exhibitions'], case['seed'])).run())
+    selection_time = time.perf_counter() - start
+    keys = {file: image_store.acquire(file) for file in files}
+    images = [{
+        'file': str(image.file),
+        'group_name': 'a',
+        'key': keys[Path(image.file)]
+    } for image in selection]
+
+    screen = app.screens()[0]
+    start = time.perf_counter()
+    for file in files:
+        decode_frame(file, screen.size())
+    scaling_time = (time.perf_counter() - start) / len(files)
+
+    key = QtCore.Qt.Key.Key_Space.value
+    window = BenchmarkWindow(
+        None, images, case['show_time'], case['interval_time'], key, False,
+        screen.name(), stream=case['stream'],
+        log=str(Path(case['dir']) / f"{time.perf_counter_ns()}.jsonl"))
+    paint_times = []
+    display_timed = window.display_timed
+
+    def display(pixmap: QtGui.QPixmap) -> int:
+        start = time.perf_counter()
+        onset = display_timed(pixmap)
+        paint_times.append(time.perf_counter() - start)
+        return onset
+    window.display_timed = display
+
+    def press() -> None:
+        QtWidgets.QApplication.sendEvent(window, QtGui.QKeyEvent(
+            QtCore.QEvent.Type.KeyPress, key,
+            QtCore.Qt.KeyboardModifier.NoModifier))
+    rng = random.Random(case['seed'])
+    trial = case['show_time'] + case['interval_time']
+    timers = []
+    for n in range(case['exhibitions']):
+        if rng.random() < case['response_rate']:
+            timer = QtCore.QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(press)
+            timer.start(round(n * trial + case['interval_time'] +
+                              rng.uniform(0, case['show_time'])))
+            timers.append(timer)
+
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    window.run()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    report = window.report
+    return {
+        **{key: value for key, value in case.items() if key != 'dir'},
+        'wall_time': wall * 1000,
+        'cpu_time': cpu * 1000,
+        'cpu_ratio': cpu / wall,
+        'peak_memory_mb': peak_memory(),
+        'stages': {
+            'selection': selection_time * 1000,
+            'preparation': report['preparation_time'],
+            'scaling': scaling_time * 1000,
+            'paint': sum(paint_times) / len(paint_times) * 1000
+        },
+        'responses': len(report['clicked_images']),
+        'input_delay_mean': (sum(report['input_delays']) /
+                             len(report['input_delays'])
+                             if report['input_delays'] else None),
+        'timing_summary': report['timing_summary']
+    }
+
+
+def metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+            text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'qt': QtCore.QT_VERSION_STR,
+        'pyqt': QtCore.PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'qpa': os.environ['QT_QPA_PLATFORM']
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure ShowWindow timing on the offscreen platform.')
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 12])
+    parser.add_argument('--exhibitions', type=int, nargs='+', default=[20])
+    parser.add_argument('--show-times', type=int, nargs='+', default=[100])
+    parser.add_argument('--interval-times', type=int, nargs='+', default=[50])
+    parser.add_argument('--unique', type=int, default=10)
+    parser.add_argument('--stream', type=int, default=0)
+    parser.add_argument('--response-rate', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+    results = []
+    with TemporaryDirectory() as dir:
+        for megapixels in args.megapixels:
+            make_images(Path(dir), megapixels, args.unique)
+        for megapixels, exhibitions, show_time, interval_time in \
+                itertools.product(args.megapixels, args.exhibitions,
+                                  args.show_times, args.interval_times):
+            case = {
+                'dir': dir,
+                'megapixels': megapixels,
+                'exhibitions': exhibitions,
+                'show_time': show_time,
+                'interval_time': interval_time,
+                'unique': args.unique,
+                'stream': args.stream,
+                'response_rate': args.response_rate,
+                'seed': args.seed
+            }
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__),
+                 '--case', json.dumps(case)],
+                capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            summary = result['timing_summary']
+            print(f"{megapixels:>6g} MP {exhibitions:>5} x {show_time}/"
+                  f"{interval_time} ms  jitter {summary['onset_jitter_mean']:.2f}"
+                  f"/{summary['onset_jitter_max']:.2f} ms  cpu "
+                  f"{result['cpu_ratio']:.0%}  peak {result['peak_memory_mb']:.0f} MB",
+                  file=sys.stderr)
+            results.append(result)
+    report = {'metadata': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+from tempfile import TemporaryDirectory
+from PIL import Image
+import argparse
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loader import decode_image, decode_thumbnail  # noqa: E402
+from thumbnails import make_thumbnail  # noqa: E402
+
+
+def full_decode(file: Path) -> None:
+    make_thumbnail(decode_image(file))
+
+
+def reduced_decode(file: Path) -> None:
+    decode_thumbnail(file)
+
+
+def make_images(dir: Path, megapixels: float, format: str,
+                count: int) -> list[Path]:
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    files = []
+    for n in range(count):
+        file = dir / f'{megapixels}mp_{n}.{format.lower()}'
+        Image.effect_noise((width, height), 64 + n).convert('RGB').save(file)
+        files.append(file)
+    return files
+
+
+def measure(function: Any, files: list[Path], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file in files:
+            function(file)
+        best = min(best, (time.perf_counter() - start) / len(files))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare full and reduced-size thumbnail decoding.')
+    parser.add_argument('--megapixels', type=float, nargs='+',
+                        default=[1, 4, 12, 24])
+    parser.add_argument('--formats', nargs='+', default=['JPEG', 'PNG'])
+    parser.add_argument('--count', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(f"{'format':<8}{'MP':>6}{'full (ms)':>12}{'reduced (ms)':>14}{'speedup':>10}")
+    with TemporaryDirectory() as dir:
+        for format in args.formats:
+            for megapixels in args.megapixels:
+                files = make_images(Path(dir), megapixels, format, args.count)
+                full = measure(full_decode, files, args.repeat)
+                reduced = measure(reduced_decode, files, args.repeat)
+                print(f'{format:<8}{megapixels:>6g}{full * 1000:>12.1f}'
+                      f'{reduced * 1000:>14.1f}{full / reduced:>9.1f}x')
+                for file in files:
+                    os.remove(file)
+
+
+if __name__ == '__main__':
+    main()
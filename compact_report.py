@@ -0,0 +1,139 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+from timing import TIMESTAMPS
+import numpy as np
+import argparse
+import zipfile
+import json
+
+TIMES = ('times', 'relative_times', 'raw_times', 'raw_relative_times',
+         'input_delays')
+TIMING_COLUMNS = (*TIMESTAMPS, 'duration')
+
+
+def to_compact(report: dict[str, Any]) -> dict[str, np.ndarray]:
+    images = report['images']
+    strings, codes = np.unique(np.array(
+        [image['file'] for image in images] +
+        [image['group'] for image in images] or [''], dtype=str),
+        return_inverse=True)
+    codes = codes.reshape(-1).astype(np.int32)
+    arrays = {
+        'strings': strings,
+        'image_file': codes[:len(images)],
+        'image_group': codes[len(images):2 * len(images)],
+        'clicked_images': np.asarray(report['clicked_images'], dtype=np.int32)
+    }
+    for key in TIMES:
+        if key in report:
+            arrays[key] = np.asarray(report[key], dtype=np.float64)
+    if 'timings' in report:
+        for column in TIMING_COLUMNS:
+            arrays[f'timing_{column}'] = np.array(
+                [trial.get(column, np.nan) for trial in report['timings']],
+                dtype=np.float64)
+        arrays['timing_skipped'] = np.array(
+            [trial['skipped'] for trial in report['timings']], dtype=bool)
+    if 'flip_times' in report:
+        arrays['flip_times'] = np.array(
+            [flip if flip is not None else (np.nan, np.nan)
+             for flip in report['flip_times']],
+            dtype=np.float64).reshape(-1, 2)
+    meta = {key: value for key, value in report.items()
+            if key not in ('images', 'clicked_images', 'timings',
+                           'flip_times', *TIMES)}
+    arrays['meta'] = np.array(json.dumps({'keys': list(report), **meta}))
+    return arrays
+
+
+def from_compact(arrays: Any) -> dict[str, Any]:
+    meta = json.loads(str(arrays['meta']))
+    strings = arrays['strings'].tolist()
+    report = {}
+    for key in meta.pop('keys'):
+        if key == 'images':
+            report[key] = [
+                {'file': strings[file], 'group': strings[group]}
+                for file, group in zip(arrays['image_file'].tolist(),
+                                       arrays['image_group'].tolist())
+            ]
+        elif key == 'clicked_images' or key in TIMES:
+            report[key] = arrays[key].tolist()
+        elif key == 'timings':
+            columns = {column: arrays[f'timing_{column}'].tolist()
+                       for column in TIMING_COLUMNS}
+            report[key] = [
+                {
+                    **{column: columns[column][n] for column in TIMING_COLUMNS
+                       if not np.isnan(columns[column][n])},
+                    'skipped': skipped
+                }
+                for n, skipped in enumerate(arrays['timing_skipped'].tolist())
+            ]
+        elif key == 'flip_times':
+            report[key] = [None if np.isnan(flip[0]) else flip
+                           for flip in arrays[key].tolist()]
+        else:
+            report[key] = meta[key]
+    return report
+
+
+def save_compact(path: Path, report: dict[str, Any]) -> None:
+    np.savez(path, **to_compact(report))
+
+
+def load_compact(path: Path, mmap: bool = True) -> dict[str, np.ndarray]:
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename.removesuffix('.npy')
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), '<u2')
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+            shape, fortran_order, dtype = header
+            if not shape or not np.prod(shape):
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C')
+    return arrays
+
+
+def read_report(path: Path) -> dict[str, Any]:
+    if Path(path).suffix == '.npz':
+        return from_compact(load_compact(path))
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(path: Path, report: dict[str, Any]) -> None:
+    if Path(path).suffix == '.npz':
+        save_compact(path, report)
+        return
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Convert reports between JSON and the compact .npz format.')
+    parser.add_argument('source', type=Path)
+    parser.add_argument('destination', type=Path)
+    args = parser.parse_args()
+    write_report(args.destination, read_report(args.source))
+
+
+if __name__ == '__main__':
+    main()
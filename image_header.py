@@ -0,0 +1,177 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+from PIL import Image, UnidentifiedImageError
+import struct
+import os
+
+
+BMP_HEADER_SIZES = (40, 52, 56, 64, 108, 124)
+
+
+class ImageHeader(NamedTuple):
+    format: str
+    width: int
+    height: int
+
+
+def _png(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    if head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    return ImageHeader('PNG', width, height)
+
+
+def _gif(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    width, height = struct.unpack('<HH', head[6:10])
+    return ImageHeader('GIF', width, height)
+
+
+def _bmp(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    size = struct.unpack('<I', head[14:18])[0]
+    if size == 12:
+        width, height, planes = struct.unpack('<HHH', head[18:24])
+    elif size in BMP_HEADER_SIZES:
+        width, height, planes = struct.unpack('<iiH', head[18:28])
+    else:
+        return None
+    if planes != 1 or width <= 0 or height == 0:
+        return None
+    return ImageHeader('BMP', width, abs(height))
+
+
+def _webp(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    match head[12:16]:
+        case b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return ImageHeader('WEBP', width & 0x3fff, height & 0x3fff)
+        case b'VP8L':
+            bits = struct.unpack('<I', head[21:25])[0]
+            return ImageHeader('WEBP', (bits & 0x3fff) + 1,
+                               ((bits >> 14) & 0x3fff) + 1)
+        case b'VP8X':
+            return ImageHeader('WEBP',
+                               int.from_bytes(head[24:27], 'little') + 1,
+                               int.from_bytes(head[27:30], 'little') + 1)
+    return None
+
+
+def _jpeg(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        while marker == b'\xff\xff':
+            marker = marker[1:] + f.read(1)
+        if len(marker) != 2 or marker[0] != 0xff:
+            return None
+        if marker[1] in (0x01, *range(0xd0, 0xd8)):
+            continue
+        length = f.read(2)
+        if len(length) != 2:
+            return None
+        length = struct.unpack('>H', length)[0]
+        if marker[1] in (0xc0, 0xc1, 0xc2, 0xc3, 0xc5, 0xc6, 0xc7,
+                         0xc9, 0xca, 0xcb, 0xcd, 0xce, 0xcf):
+            segment = f.read(5)
+            if len(segment) != 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            return ImageHeader('JPEG', width, height)
+        if marker[1] in (0xd9, 0xda):
+            return None
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _tiff(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    order = '<' if head[:2] == b'II' else '>'
+    f.seek(struct.unpack(order + 'I', head[4:8])[0])
+    count = f.read(2)
+    if len(count) != 2:
+        return None
+    size = {}
+    for _ in range(struct.unpack(order + 'H', count)[0]):
+        entry = f.read(12)
+        if len(entry) != 12:
+            return None
+        tag, type_ = struct.unpack(order + 'HH', entry[:4])
+        if tag in (256, 257):
+            if type_ == 3:
+                size[tag] = struct.unpack(order + 'H', entry[8:10])[0]
+            else:
+                size[tag] = struct.unpack(order + 'I', entry[8:12])[0]
+            if len(size) == 2:
+                return ImageHeader('TIFF', size[256], size[257])
+    return None
+
+
+def _pnm(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    if not head[2:3].isspace():
+        return None
+    count = 2 if head[1:2] in (b'1', b'4') else 3
+    tokens = []
+    for line in head[2:].splitlines():
+        tokens += line.split(b'#')[0].split()
+        if len(tokens) >= count:
+            if not all(token.isdigit() for token in tokens[:count]):
+                return None
+            width, height, *maxval = map(int, tokens[:count])
+            if width == 0 or height == 0 or \
+                    (maxval and not 0 < maxval[0] < 65536):
+                return None
+            return ImageHeader('PPM', width, height)
+    return None
+
+
+SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', _png),
+    (b'\xff\xd8\xff', _jpeg),
+    (b'GIF87a', _gif),
+    (b'GIF89a', _gif),
+    (b'BM', _bmp),
+    (b'II*\x00', _tiff),
+    (b'MM\x00*', _tiff),
+    *[(f'P{n}'.encode(), _pnm) for n in range(1, 7)],
+]
+
+
+def sniff(f: BinaryIO, head: bytes) -> Optional[ImageHeader]:
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return _webp(f, head)
+    for signature, parser in SIGNATURES:
+        if head.startswith(signature):
+            return parser(f, head)
+    return None
+
+
+def read_header(path: Path) -> Optional[ImageHeader]:
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(512)
+            try:
+                header = sniff(f, head)
+            except struct.error:
+                header = None
+    except OSError:
+        return None
+    if header is not None:
+        return header
+    if Path(path).suffix.lower() not in Image.registered_extensions():
+        return None
+    try:
+        with Image.open(path) as image:
+            return ImageHeader(image.format, *image.size)
+    except (UnidentifiedImageError, OSError, ValueError, SyntaxError,
+            Image.DecompressionBombError):
+        return None
+
+
+def scan_images(dir: Path) -> list[tuple[Path, ImageHeader]]:
+    images = []
+    with os.scandir(dir) as it:
+        for entry in sorted(it, key=lambda entry: entry.name):
+            if not entry.is_file():
+                continue
+            header = read_header(Path(entry.path))
+            if header is not None:
+                images.append((Path(entry.path), header))
+    return images
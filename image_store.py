@@ -0,0 +1,71 @@
+from __future__ import annotations
+from pathlib import Path
+from PyQt6 import QtGui
+from loader import decode_image, load_thumbnail
+from thumbnails import digest, file_key
+
+
+class ImageStore:
+    def __init__(self) -> None:
+        self.files: dict[str, Path] = {}
+        self.counts: dict[str, int] = {}
+        self.pixmaps: dict[str, QtGui.QPixmap] = {}
+        self.pixmap_counts: dict[str, int] = {}
+
+    @staticmethod
+    def key(file: Path) -> str:
+        try:
+            return '-'.join(file_key(file))
+        except OSError:
+            return digest(str(Path(file).resolve()))
+
+    def acquire(self, file: Path) -> str:
+        key = self.key(file)
+        self.files.setdefault(key, Path(file))
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return key
+
+    def release(self, key: str) -> None:
+        self.counts[key] -= 1
+        if self.counts[key] == 0:
+            del self.counts[key]
+            if key not in self.pixmap_counts:
+                del self.files[key]
+            QtGui.QPixmapCache.remove(key)
+
+    def insert_thumbnail(self, key: str, thumbnail: QtGui.QPixmap) -> None:
+        QtGui.QPixmapCache.insert(key, thumbnail)
+
+    def thumbnail(self, key: str) -> QtGui.QPixmap:
+        pixmap = QtGui.QPixmapCache.find(key)
+        if pixmap is None:
+            thumbnail = load_thumbnail(self.files[key])
+            pixmap = QtGui.QPixmap() if thumbnail is None else \
+                QtGui.QPixmap.fromImage(thumbnail)
+            QtGui.QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def pending(self, keys: list[str]) -> list[str]:
+        return [key for key in keys if key not in self.pixmaps]
+
+    def insert_pixmap(self, key: str, pixmap: QtGui.QPixmap) -> None:
+        self.pixmaps[key] = pixmap
+
+    def borrow(self, key: str) -> QtGui.QPixmap:
+        if key not in self.pixmaps:
+            image = decode_image(self.files[key])
+            self.pixmaps[key] = QtGui.QPixmap() if image is None else \
+                QtGui.QPixmap.fromImage(image)
+        self.pixmap_counts[key] = self.pixmap_counts.get(key, 0) + 1
+        return self.pixmaps[key]
+
+    def give_back(self, key: str) -> None:
+        self.pixmap_counts[key] -= 1
+        if self.pixmap_counts[key] == 0:
+            del self.pixmap_counts[key]
+            self.pixmaps.pop(key, None)
+            if key not in self.counts:
+                del self.files[key]
+
+
+image_store = ImageStore()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Optional
+from PyQt6 import QtCore, QtGui
+from PIL.ImageQt import ImageQt
+from PIL import Image, UnidentifiedImageError
+from thumbnails import THUMBNAIL_SIZE, thumbnail_cache
+
+DECODE_ERRORS = (UnidentifiedImageError, OSError, ValueError, SyntaxError,
+                 Image.DecompressionBombError)
+
+
+def to_qimage(image: Image.Image) -> QtGui.QImage:
+    if image.mode == '1':
+        image = image.convert('L')
+    elif image.mode not in ('L', 'P', 'I;16', 'RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    return ImageQt(image).copy()
+
+
+def decode_image(file: Path) -> Optional[QtGui.QImage]:
+    try:
+        with Image.open(file) as image:
+            return to_qimage(image)
+    except DECODE_ERRORS:
+        return None
+
+
+def decode_thumbnail(file: Path) -> Optional[QtGui.QImage]:
+    try:
+        with Image.open(file) as image:
+            image.draft(None, (THUMBNAIL_SIZE.width(),
+                               THUMBNAIL_SIZE.height()))
+            image.thumbnail((THUMBNAIL_SIZE.width(), THUMBNAIL_SIZE.height()))
+            return to_qimage(image)
+    except DECODE_ERRORS:
+        return None
+
+
+def decode_frame(file: Path, size: QtCore.QSize) -> Optional[QtGui.QImage]:
+    try:
+        with Image.open(file) as image:
+            image.draft(None, (size.width(), size.height()))
+            frame = to_qimage(image)
+    except DECODE_ERRORS:
+        return None
+    return frame.scaled(size, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                        QtCore.Qt.TransformationMode.SmoothTransformation)
+
+
+def load_thumbnail(file: Path) -> Optional[QtGui.QImage]:
+    thumbnail = thumbnail_cache.get(file)
+    if thumbnail is None:
+        thumbnail = decode_thumbnail(file)
+        if thumbnail is not None:
+            thumbnail_cache.put(file, thumbnail)
+    return thumbnail
+
+
+class LoaderSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(int, int, object, object)
+
+
+class LoadTask(QtCore.QRunnable):
+    def __init__(self, signals: LoaderSignals, generation: int, index: int,
+                 file: Path,
+                 decode: Callable[[Path], Optional[QtGui.QImage]]) -> None:
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.index = index
+        self.file = file
+        self.decode = decode
+
+    def run(self) -> None:
+        try:
+            image = self.decode(self.file)
+        except Exception:
+            image = None
+        self.signals.done.emit(self.generation, self.index, self.file, image)
+
+
+class ImageLoader(QtCore.QObject):
+    loaded = QtCore.pyqtSignal(object, object)
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None,
+                 max_threads: Optional[int] = None,
+                 decode: Callable[[Path], Optional[QtGui.QImage]] = load_thumbnail) -> None:
+        super().__init__(parent)
+        self.decode = decode
+        self.pool = QtCore.QThreadPool(self)
+        if max_threads is not None:
+            self.pool.setMaxThreadCount(max_threads)
+        self.signals = LoaderSignals()
+        self.signals.done.connect(self._done)
+        self.generation = 0
+        self.total = 0
+        self.count = 0
+        self.results: dict[int, tuple[Path, Optional[QtGui.QImage]]] = {}
+
+    def running(self) -> bool:
+        return self.count < self.total
+
+    def load(self, files: list[Path]) -> None:
+        if not files:
+            return
+        self.total += len(files)
+        self.progress.emit(self.count, self.total)
+        for index, file in enumerate(files, self.total - len(files)):
+            self.pool.start(LoadTask(self.signals, self.generation, index,
+                                     file, self.decode))
+
+    def cancel(self) -> None:
+        if not self.running():
+            return
+        self.pool.clear()
+        self.generation += 1
+        self.total = 0
+        self.count = 0
+        self.results.clear()
+        self.finished.emit()
+
+    def _done(self, generation: int, index: int, file: Path,
+              image: Optional[QtGui.QImage]) -> None:
+        if generation != self.generation:
+            return
+        self.results[index] = (file, image)
+        while self.count in self.results:
+            file, image = self.results.pop(self.count)
+            self.count += 1
+            if image is not None:
+                self.loaded.emit(file, image)
+        self.progress.emit(self.count, self.total)
+        if self.count == self.total:
+            self.total = 0
+            self.count = 0
+            self.finished.emit()
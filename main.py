@@ -8,21 +8,18 @@ from templates.MainWindow.MainWindow import Ui_MainWindow as MainWindow
 from templates.Image.Image import Ui_Form as ImageLabel
 import sys
 import os
+import weakref
+import random
 from math import floor
 import json
-from select_images import SelectImages
-from itertools import chain
-from show import ShowWindow
-from PIL.ImageQt import ImageQt
-from PIL import Image, UnidentifiedImageError
-
-
-def is_image(path: Path) -> bool:
-    try:
-        Image.open(path)
-        return True
-    except UnidentifiedImageError:
-        return False
+from schedule_cache import generate_schedule, schedule_cache
+from show import ShowWindow, STREAM_DEPTH, stream_needed
+from loader import ImageLoader
+from thumbnails import THUMBNAIL_SIZE
+from image_store import image_store
+from image_header import ImageHeader, read_header, scan_images
+from trial_log import find_checkpoint, log_progress, read_checkpoint, \
+    remove_checkpoint, session_path, write_checkpoint
 
 
 def get_sys() -> str | None:
@@ -43,32 +40,29 @@ def get_id(n: int = 0) -> Generator[int, None, None]:
         n += 1
 
 
-class ImageFrame(QtWidgets.QFrame):
+class ImageItem:
     def __init__(self, file: Path, id: int,
-                 master: Optional[ImageGroupFrame] = None,
-                 pixmap: Optional[QtGui.QPixmap] = None,
-                 pil_image: Optional[ImageQt] = None, rate: int = 1) -> None:
-        super().__init__()
-        self.ui = ImageLabel()
-        self.ui.setupUi(self)
+                 master: Optional[ImageGroupFrame] = None, rate: int = 1,
+                 thumbnail: Optional[QtGui.QPixmap] = None,
+                 header: Optional[ImageHeader] = None) -> None:
         self.master = master
-        self.pixmap = pixmap
-        self.pil_image = pil_image
         self.file = file
+        self.header = header
         self.id = id
-        self.setImage()
-        self.ui.pushButton.setVisible(False)
-        self.ui.spinBox.setVisible(False)
-        self.ui.pushButton.clicked.connect(self.removeEvent)
-        self.ui.pushButton.setText('R')
-        self.ui.spinBox.setRange(1, 999999)
-        self.ui.spinBox.setValue(rate)
+        self.rate_ = rate
+        self.key = image_store.acquire(file)
+        weakref.finalize(self, image_store.release, self.key)
+        if thumbnail:
+            image_store.insert_thumbnail(self.key, thumbnail)
 
     def group_name(self) -> str:
         return self.master.name
 
     def rate(self) -> int:
-        return self.ui.spinBox.value()
+        return self.rate_
+
+    def setRate(self, rate: int) -> None:
+        self.rate_ = rate
 
     def get_configs(self) -> dict[str, Any]:
         return {
@@ -76,51 +70,211 @@ class ImageFrame(QtWidgets.QFrame):
             'rate': self.rate()
         }
 
-    def setImage(self) -> None:
-        if not self.pixmap:
-            if self.pil_image is None:
-                self.pil_image = ImageQt(self.file)
-            self.pixmap = QtGui.QPixmap.fromImage(self.pil_image)
-        self.ui.label.setPixmap(self.pixmap)
+    def thumbnail(self) -> QtGui.QPixmap:
+        return image_store.thumbnail(self.key)
 
-    def enterEvent(self, event: Any) -> None:
-        self.ui.pushButton.setVisible(True)
-        self.ui.spinBox.setVisible(True)
 
-    def leaveEvent(self, event: Any) -> None:
-        self.ui.pushButton.setVisible(False)
-        self.ui.spinBox.setVisible(False)
+class ImageFrame(QtWidgets.QFrame):
+    def __init__(self, image: ImageItem, view: ImageStripView,
+                 parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self.ui = ImageLabel()
+        self.ui.setupUi(self)
+        self.image = image
+        self.view = view
+        self.ui.label.setPixmap(image.thumbnail())
+        self.ui.pushButton.clicked.connect(self.removeEvent)
+        self.ui.pushButton.setText('R')
+        self.ui.spinBox.setRange(1, 999999)
+        self.ui.spinBox.setValue(image.rate())
+        self.ui.spinBox.valueChanged.connect(image.setRate)
+        self.dragging = False
+        self.released = False
 
     def removeEvent(self, event: Any) -> None:
-        master_images = self.master.images()
-        if self != master_images[-1]:
-            master_images[master_images.index(self) + 1].enterEvent(None)
-        self.delete()
-
-    def delete(self):
-        self.master.removeImage(self)
+        self.image.master.removeImageAt(self.view.hovered.row())
+        self.view.updateHover()
 
     def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
         if event.buttons() & QtCore.Qt.MouseButton.LeftButton:
-            self.master.master.drag_cache = self
-            drag = QtGui.QDrag(self)
+            self.view.master.master.drag_cache = self.image
+            self.view.master.master.drag_row = self.view.hovered.row()
+            thumbnail = self.image.thumbnail()
+            drag = QtGui.QDrag(self.view)
             mimedata = QtCore.QMimeData()
-            mimedata.setImageData(self.pixmap)
+            mimedata.setImageData(thumbnail)
             drag.setMimeData(mimedata)
             pixmap = QtGui.QPixmap(QtCore.QSize(150, 150))
             pixmap.fill(QtCore.Qt.GlobalColor.transparent)
             painter = QtGui.QPainter(pixmap)
             painter.setOpacity(0.5)
-            painter.drawPixmap(self.rect(), self.pixmap)
+            painter.drawPixmap(self.rect(), thumbnail)
             painter.end()
             drag.setPixmap(pixmap)
             drag.setHotSpot(event.pos())
+            self.dragging = True
             drag.exec()
+            self.dragging = False
+            self.view.master.master.drag_row = None
+            if self.released:
+                self.deleteLater()
+
+
+class ImageListModel(QtCore.QAbstractListModel):
+    def __init__(self, images: list[ImageItem] = [],
+                 parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.images = list(images)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.images)
+
+    def data(self, index: QtCore.QModelIndex,
+             role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        image = self.images[index.row()]
+        match role:
+            case QtCore.Qt.ItemDataRole.DecorationRole:
+                return image.thumbnail()
+            case QtCore.Qt.ItemDataRole.ToolTipRole:
+                if image.header is None:
+                    return str(image.file)
+                return f'{image.file}\n{image.header.format} ' \
+                    f'{image.header.width} x {image.header.height}'
+            case QtCore.Qt.ItemDataRole.UserRole:
+                return image
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsEditable
+
+    def insertImage(self, row: int, image: ImageItem) -> None:
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.images.insert(row, image)
+        self.endInsertRows()
+
+    def removeImage(self, image: ImageItem) -> None:
+        self.removeImageAt(self.images.index(image))
+
+    def removeImageAt(self, row: int) -> None:
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.images[row]
+        self.endRemoveRows()
+
+    def moveImage(self, source: int, destination: int) -> None:
+        self.beginMoveRows(QtCore.QModelIndex(), source, source,
+                           QtCore.QModelIndex(),
+                           destination + 1 if destination > source else destination)
+        self.images.insert(destination, self.images.pop(source))
+        self.endMoveRows()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.images = []
+        self.endResetModel()
+
+
+class ImageDelegate(QtWidgets.QStyledItemDelegate):
+    def __init__(self, view: ImageStripView) -> None:
+        super().__init__(view)
+        self.view = view
+
+    def imageRect(self, rect: QtCore.QRect) -> QtCore.QRect:
+        image_rect = QtCore.QRect(QtCore.QPoint(0, 0), THUMBNAIL_SIZE)
+        image_rect.moveCenter(rect.center())
+        return image_rect
+
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem,
+                 index: QtCore.QModelIndex) -> QtCore.QSize:
+        return THUMBNAIL_SIZE
+
+    def paint(self, painter: QtGui.QPainter,
+              option: QtWidgets.QStyleOptionViewItem,
+              index: QtCore.QModelIndex) -> None:
+        painter.drawPixmap(self.imageRect(option.rect), index.data(
+            QtCore.Qt.ItemDataRole.DecorationRole))
+
+    def createEditor(self, parent: QtWidgets.QWidget,
+                     option: QtWidgets.QStyleOptionViewItem,
+                     index: QtCore.QModelIndex) -> ImageFrame:
+        return ImageFrame(index.data(QtCore.Qt.ItemDataRole.UserRole),
+                          self.view, parent)
+
+    def updateEditorGeometry(self, editor: QtWidgets.QWidget,
+                             option: QtWidgets.QStyleOptionViewItem,
+                             index: QtCore.QModelIndex) -> None:
+        editor.setGeometry(self.imageRect(option.rect))
+
+    def destroyEditor(self, editor: QtWidgets.QWidget,
+                      index: QtCore.QModelIndex) -> None:
+        if editor.dragging:
+            editor.released = True
+            return
+        super().destroyEditor(editor, index)
+
+    def setEditorData(self, editor: QtWidgets.QWidget,
+                      index: QtCore.QModelIndex) -> None:
+        pass
+
+    def setModelData(self, editor: QtWidgets.QWidget,
+                     model: QtCore.QAbstractItemModel,
+                     index: QtCore.QModelIndex) -> None:
+        pass
+
+
+class ImageStripView(QtWidgets.QListView):
+    def __init__(self, model: ImageListModel,
+                 master: ImageGroupFrame) -> None:
+        super().__init__(master)
+        self.master = master
+        self.setModel(model)
+        self.setItemDelegate(ImageDelegate(self))
+        self.setFlow(QtWidgets.QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QtWidgets.QListView.LayoutMode.Batched)
+        self.setGridSize(QtCore.QSize(156, 156))
+        self.setHorizontalScrollMode(
+            QtWidgets.QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setVerticalScrollBarPolicy(
+            QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.NoSelection)
+        self.setMouseTracking(True)
+        self.hovered = QtCore.QPersistentModelIndex()
+
+    def rowAt(self, x: float) -> int:
+        return floor((x + self.horizontalOffset()) / self.gridSize().width())
+
+    def setHover(self, index: QtCore.QModelIndex) -> None:
+        if index == self.hovered:
+            return
+        if self.hovered.isValid():
+            self.closePersistentEditor(QtCore.QModelIndex(self.hovered))
+        self.hovered = QtCore.QPersistentModelIndex(index)
+        if index.isValid():
+            self.openPersistentEditor(index)
+
+    def updateHover(self) -> None:
+        self.setHover(self.indexAt(
+            self.viewport().mapFromGlobal(QtGui.QCursor.pos())))
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
+        super().mouseMoveEvent(event)
+        self.setHover(self.indexAt(event.pos()))
+
+    def leaveEvent(self, event: Any) -> None:
+        super().leaveEvent(event)
+        if not self.rect().contains(self.mapFromGlobal(QtGui.QCursor.pos())):
+            self.setHover(QtCore.QModelIndex())
 
 
 class ImageGroupFrame(QtWidgets.QFrame, QtWidgets.QApplication):
     def __init__(self, master: Stimulus, id: int,
-                 images: list[ImageFrame] = [], name: str = '') -> None:
+                 images: list[ImageItem] = [], name: str = '') -> None:
         super().__init__()
         self.ui = ImageGroup()
         self.ui.setupUi(self)
@@ -133,10 +287,31 @@ class ImageGroupFrame(QtWidgets.QFrame, QtWidgets.QApplication):
         self.ui.pushButton_3.clicked.connect(self.delete)
         self.ui.pushButton.clicked.connect(self.addImageEvent)
         self.ui.pushButton_2.clicked.connect(self.addFolderEvent)
+        self.progressBar = QtWidgets.QProgressBar(self)
+        self.progressBar.setMaximumSize(QtCore.QSize(250, 25))
+        self.progressBar.setVisible(False)
+        self.cancelButton = QtWidgets.QPushButton(self)
+        self.cancelButton.setMaximumSize(QtCore.QSize(80, 25))
+        self.cancelButton.setText("Cancel")
+        self.cancelButton.setVisible(False)
+        self.ui.gridLayout.addWidget(self.progressBar, 2, 1, 1, 1)
+        self.ui.gridLayout.addWidget(self.cancelButton, 2, 2, 1, 1)
+        self.loader = ImageLoader(self)
+        self.loader.loaded.connect(self.imageLoaded)
+        self.loader.progress.connect(self.loadingProgress)
+        self.loader.finished.connect(self.loadingFinished)
+        self.headers: dict[Path, ImageHeader] = {}
+        self.cancelButton.clicked.connect(self.loader.cancel)
         self.setAcceptDrops(True)
-        for n, image in enumerate(images):
-            self.ui.horizontalLayout_2.insertWidget(n, image)
+        for image in images:
             image.master = self
+            self.master.image_registry[image.id] = image
+        self.model = ImageListModel(images, self)
+        self.view = ImageStripView(self.model, self)
+        self.view.setMinimumSize(self.ui.scrollArea.minimumSize())
+        self.view.setMaximumSize(self.ui.scrollArea.maximumSize())
+        self.ui.gridLayout.replaceWidget(self.ui.scrollArea, self.view)
+        self.ui.scrollArea.deleteLater()
         self.ui.spinBox.setRange(1, 999999)
         self.ui.spinBox.setValue(1)
 
@@ -154,80 +329,92 @@ class ImageGroupFrame(QtWidgets.QFrame, QtWidgets.QApplication):
             'images': {image.id: image.get_configs() for image in self.images()}
         }
 
-    def images(self) -> list[ImageFrame]:
-        return [self.ui.horizontalLayout_2.itemAt(i).widget() for i in range(self.ui.horizontalLayout_2.count() - 1)]
+    def images(self) -> list[ImageItem]:
+        return list(self.model.images)
 
     def delete(self, event: Any) -> None:
         self.master.removeImageGroupBtn(self)
 
-    def addImage(self, image: ImageFrame) -> None:
-        self.ui.horizontalLayout_2.insertWidget(
-            self.ui.horizontalLayout_2.count() - 1, image)
+    def addImage(self, image: ImageItem) -> None:
+        self.insertImage(self.model.rowCount(), image)
+
+    def insertImage(self, row: int, image: ImageItem) -> None:
+        image.master = self
+        self.master.image_registry[image.id] = image
+        self.model.insertImage(row, image)
 
     def addImageEvent(self, event: Any) -> None:
         files = QtWidgets.QFileDialog.getOpenFileUrls(
             self, "Open File", QtCore.QUrl("."),
             "Images (*.png *.jpg *.jpeg *.bmp *.gif, *.rgb, *.pgm, *.ppm, *.tiff, *.rast, *.xbm, *.exr, *.webp)")[0]
-        for file in files:
-            file_ = Path(file.path())
-            if is_image(file_):
-                self.addImage(ImageFrame(file_, self.master.get_id(), self))
+        self.loadImages([(Path(file.path()), read_header(Path(file.path())))
+                         for file in files])
 
     def addFolderEvent(self, event: Any) -> None:
         dir = QtWidgets.QFileDialog.getExistingDirectory(
             self, "Open Directory")
         if dir:
-            for file in [os.path.join(dir, file) for file in os.listdir(dir)]:
-                file_ = Path(file)
-                if is_image(file_):
-                    self.addImage(ImageFrame(
-                        file_, self.master.get_id(), self))
-
-    def removeImage(self, image: ImageFrame) -> None:
-        image.hide()
-        self.ui.horizontalLayout_2.removeWidget(image)
+            self.loadImages(scan_images(Path(dir)))
+
+    def loadImages(self, images: list[tuple[Path, Optional[ImageHeader]]]) -> None:
+        images = [(file, header) for file, header in images
+                  if header is not None]
+        self.headers.update(images)
+        self.loader.load([file for file, _ in images])
+
+    def imageLoaded(self, file: Path, thumbnail: QtGui.QImage) -> None:
+        self.addImage(ImageItem(file, self.master.get_id(), self,
+                                thumbnail=QtGui.QPixmap.fromImage(thumbnail),
+                                header=self.headers.pop(file, None)))
+
+    def loadingProgress(self, count: int, total: int) -> None:
+        self.progressBar.setRange(0, total)
+        self.progressBar.setValue(count)
+        self.progressBar.setVisible(True)
+        self.cancelButton.setVisible(True)
+
+    def loadingFinished(self) -> None:
+        self.headers.clear()
+        self.progressBar.setVisible(False)
+        self.cancelButton.setVisible(False)
+
+    def removeImage(self, image: ImageItem) -> None:
+        del self.master.image_registry[image.id]
+        self.model.removeImage(image)
+
+    def removeImageAt(self, row: int) -> None:
+        del self.master.image_registry[self.model.images[row].id]
+        self.model.removeImageAt(row)
 
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:
-        if isinstance(self.master.drag_cache, ImageFrame):
+        if isinstance(self.master.drag_cache, ImageItem):
             event.accept()
         else:
             event.ignore()
 
     def dragLeaveEvent(self, event: Any) -> None:
-        if isinstance(self.master.drag_cache, ImageFrame):
-            image = list(filter(lambda x: x.id ==
-                                self.master.drag_cache.id, self.images()))[0]
-            self.removeImage(image)
+        if (isinstance(self.master.drag_cache, ImageItem) and
+                self.master.drag_cache.master is self and
+                self.master.drag_row is not None):
+            self.removeImageAt(self.master.drag_row)
+            self.master.drag_row = None
 
     def dragMoveEvent(self, event: QtGui.QDragMoveEvent) -> None:
-        if len(self.images()) == 0:
-            self.ui.horizontalLayout_2.insertWidget(
-                0, ImageFrame(self.master.drag_cache.file,
-                              self.master.drag_cache.id,
-                              self,
-                              self.master.drag_cache.pixmap,
-                              self.master.drag_cache.pil_image,
-                              self.master.drag_cache.rate()))
-            return
-        absolute_pos = event.position().x()
-        scroll_relative_pos = absolute_pos + \
-            self.ui.scrollArea.horizontalScrollBar().value() - 9
-        hovering_index = floor(scroll_relative_pos / 156)
+        image = self.master.drag_cache
+        inside = image.master is self and self.master.drag_row is not None
+        absolute_pos = self.view.viewport().mapFrom(
+            self, event.position().toPoint()).x()
+        hovering_index = self.view.rowAt(absolute_pos)
+        last_index = self.model.rowCount() - 1 if inside else self.model.rowCount()
         if hovering_index < 0:
             hovering_index = 0
-        if hovering_index >= len(self.images()):
-            hovering_index = len(self.images()) - 1
-        if (self.ui.horizontalLayout_2.itemAt(hovering_index) is not None and self.ui.horizontalLayout_2.itemAt(hovering_index).widget().id != self.master.drag_cache.id):
-            for image in self.images():
-                if image.id == self.master.drag_cache.id:
-                    self.removeImage(image)
-            self.ui.horizontalLayout_2.insertWidget(
-                hovering_index, ImageFrame(self.master.drag_cache.file,
-                                           self.master.drag_cache.id,
-                                           self,
-                                           self.master.drag_cache.pixmap,
-                                           self.master.drag_cache.pil_image,
-                                           self.master.drag_cache.rate()))
+        if hovering_index > last_index:
+            hovering_index = last_index
+        if not inside:
+            self.insertImage(hovering_index, image)
+        elif hovering_index != self.master.drag_row:
+            self.model.moveImage(self.master.drag_row, hovering_index)
+        self.master.drag_row = hovering_index
 
     def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
         if event.buttons() & QtCore.Qt.MouseButton.LeftButton:
@@ -285,6 +472,21 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
         self.buttonGroup_3.addButton(self.radioButton_9)
         self.buttonGroup_4.addButton(self.radioButton_7)
         self.buttonGroup_4.addButton(self.radioButton_8)
+        self.checkBox_4 = QtWidgets.QCheckBox(self.frame_7)
+        self.checkBox_4.setObjectName("checkBox_4")
+        self.checkBox_4.setText("Vsync frame timing")
+        self.label_13 = QtWidgets.QLabel(self.frame_7)
+        self.label_13.setObjectName("label_13")
+        self.label_13.setText("Seed")
+        self.lineEdit_4 = QtWidgets.QLineEdit(self.frame_7)
+        self.lineEdit_4.setObjectName("lineEdit_4")
+        self.lineEdit_4.setPlaceholderText("Random")
+        self.lineEdit_4.setValidator(self.onlyInt)
+        self.gridLayout_5.removeWidget(self.frame_9)
+        self.gridLayout_5.addWidget(self.checkBox_4, 12, 0, 1, 2)
+        self.gridLayout_5.addWidget(self.label_13, 13, 0, 1, 1)
+        self.gridLayout_5.addWidget(self.lineEdit_4, 13, 1, 1, 1)
+        self.gridLayout_5.addWidget(self.frame_9, 14, 0, 1, 2)
         self.buttonGroups = [self.buttonGroup, self.buttonGroup_2,
                              self.buttonGroup_3, self.buttonGroup_4]
         self.pushButton_2.clicked.connect(self.saveSettingsEvent)
@@ -294,6 +496,11 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             self.comboBox.addItem(screen.name())
         self.pushButton_4.clicked.connect(self.startEvent)
         self.drag_cache = None
+        self.drag_row = None
+        self.group_registry: dict[int, ImageGroupFrame] = {}
+        self.image_registry: dict[int, ImageItem] = {}
+        self.session_keys: list[str] = []
+        QtGui.QPixmapCache.setCacheLimit(64 * 1024)
         self.load_default()
 
     def clear(self) -> None:
@@ -357,13 +564,17 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
         if id == None:
             id = self.get_id()
         group = ImageGroupFrame(self, id, images, name)
+        self.group_registry[id] = group
         self.verticalLayout.insertWidget(
             self.verticalLayout.count() - 2, group)
 
     def removeImageGroup(self, group: ImageGroupFrame) -> None:
+        group.loader.cancel()
         group.hide()
-        for image in group.images():
-            group.removeImage(image)
+        for image in group.model.images:
+            del self.image_registry[image.id]
+        del self.group_registry[group.id]
+        group.model.clear()
         self.verticalLayout.removeWidget(group)
 
     def removeImageGroupBtn(self, group: ImageGroupFrame) -> None:
@@ -383,30 +594,11 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
         hovering_index = floor(scroll_relative_pos / 286)
         if hovering_index < 0:
             hovering_index = 0
-        if hovering_index >= len(self.groups()):
-            hovering_index = len(self.groups()) - 1
-        if self.verticalLayout.itemAt(hovering_index) is not None and self.verticalLayout.itemAt(hovering_index).widget().id != self.drag_cache.id:
-            group_id = self.drag_cache.id
-            name = self.drag_cache.ui.lineEdit.text()
-            pixmaps = [image.pixmap for image in self.drag_cache.images()]
-            pil_images = [
-                image.pil_image for image in self.drag_cache.images()]
-            ids = [image.id for image in self.drag_cache.images()]
-            files = [image.file for image in self.drag_cache.images()]
-            rates = [image.rate() for image in self.drag_cache.images()]
-            images = [ImageFrame(file, id, self, pixmap, pil_image, rate)
-                      for pixmap, pil_image, id, file, rate in zip(pixmaps, pil_images, ids, files, rates)]
-            for group in self.groups():
-                if group.id == self.drag_cache.id:
-                    self.removeImageGroup(group)
-            self.verticalLayout.insertWidget(
-                hovering_index, ImageGroupFrame(self, -1, images, name))
-            group = list(filter(lambda group: group.id ==
-                                -1, self.groups()))[0]
-            for image in group.images():
-                image.master = group
-            group.id = group_id
-            self.drag_cache = group
+        if hovering_index >= len(self.group_registry):
+            hovering_index = len(self.group_registry) - 1
+        if self.verticalLayout.indexOf(self.drag_cache) != hovering_index:
+            self.verticalLayout.removeWidget(self.drag_cache)
+            self.verticalLayout.insertWidget(hovering_index, self.drag_cache)
 
     def intergroup_show_order(self) -> str:
         widgets = list(filter(lambda x: x.isChecked(),
@@ -462,6 +654,16 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
     def skip_on_click(self) -> bool:
         return self.checkBox_3.isChecked()
 
+    def vsync(self) -> bool:
+        return self.checkBox_4.isChecked()
+
+    def seed(self) -> int | None:
+        text = self.lineEdit_4.text()
+        if self.lineEdit_4.text():
+            return int(text)
+        else:
+            return None
+
     def screen_(self) -> str:
         return self.comboBox.currentText()
 
@@ -475,7 +677,7 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
                 self.interaction_key_id.x(), self.interaction_key_id.y())
         else:
             interaction_key_id = None
-        if self.groups():
+        if self.group_registry:
             n = self.get_id()
             self.ids_generator = get_id(n)
         else:
@@ -493,6 +695,8 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             'interval_time': self.interval_time(),
             'interaction_key': interaction_key_id,
             'skip_on_click': self.skip_on_click(),
+            'vsync': self.vsync(),
+            'seed': self.seed(),
             'n': n
         }
         return configs
@@ -604,11 +808,19 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             if configs['skip_on_click']:
                 self.checkBox_3.setChecked(True)
 
+            # vsync
+            if configs.get('vsync'):
+                self.checkBox_4.setChecked(True)
+
+            # seed
+            if configs.get('seed') is not None:
+                self.lineEdit_4.setText(str(configs['seed']))
+
             # images
             if configs['groups']:
                 for group in configs['groups']:
                     images = [
-                        ImageFrame(Path(configs['groups'][group]['images'][i]['file']), int(i), rate=configs['groups'][group]['images'][i]['rate']) for i in configs['groups'][group]['images']
+                        ImageItem(Path(configs['groups'][group]['images'][i]['file']), int(i), rate=configs['groups'][group]['images'][i]['rate']) for i in configs['groups'][group]['images']
                     ]
                     self.addImageGroup(
                         images, configs['groups'][group]['name'], int(group), configs['groups'][group]['rate'])
@@ -638,12 +850,13 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             self.load_settings(path[0])
 
     def isDeterministicValid(self) -> bool:
+        groups = self.group_registry.values()
+        groups_rate = sum([group.rate() for group in groups])
         if str(self.amount_of_exhibitions()).isnumeric():
-            if self.amount_of_exhibitions() % sum([group.rate() for group in self.groups()]) != 0:
+            if self.amount_of_exhibitions() % groups_rate != 0:
                 return False
-        groups_load_unity = self.amount_of_exhibitions() / \
-            sum([group.rate() for group in self.groups()])
-        for group in self.groups():
+        groups_load_unity = self.amount_of_exhibitions() / groups_rate
+        for group in groups:
             if (group.rate() * groups_load_unity) % sum([image.rate() for image in group.images()]) != 0:
                 return False
         return True
@@ -660,7 +873,7 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             text += 'Please select selection rate behaviour.\n'
         if not self.amount_of_exhibitions():
             text += 'Please enter amount of exhibitions.\n'
-        elif not self.allow_image_repeat() and sum([len(group.images()) for group in self.groups()]) < self.amount_of_exhibitions():
+        elif not self.allow_image_repeat() and len(self.image_registry) < self.amount_of_exhibitions():
             text += "Amount of exhibitions can't be greater than the total amount of images if images aren't allowed to repeat.\n"
         if not self.show_time():
             text += 'Please enter show time.\n'
@@ -668,13 +881,13 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             text += 'Please enter interval time.\n'
         if self.interaction_key() == 'Click to set':
             text += 'Please set interaction key.\n'
-        if not self.groups():
+        if not self.group_registry:
             text += 'Please add at least one group.\n'
-        for group in self.groups():
-            if not group.images():
+        for group in self.group_registry.values():
+            if not group.model.rowCount():
                 text += 'All groups must have at least one image.\n'
                 break
-        for group in self.groups():
+        for group in self.group_registry.values():
             if not group.name:
                 text += 'All groups must have a name.\n'
                 break
@@ -692,27 +905,84 @@ class Stimulus(QtWidgets.QMainWindow, MainWindow):
             return False
         return True
 
+    def resume_prompt(self, checkpoint: dict[str, Any], done: int) -> bool:
+        btn = QtWidgets.QMessageBox.question(
+            self, 'Resume session',
+            f"An interrupted session was found ({done} of "
+            f"{len(checkpoint['schedule'])} exhibitions done).\n"
+            "Do you want to resume it?")
+        return btn == QtWidgets.QMessageBox.StandardButton.Yes
+
+    def resumeSession(self, checkpoint: dict[str, Any], done: int) -> None:
+        if self.interaction_key() == 'Click to set':
+            QtWidgets.QMessageBox.warning(
+                self, 'Error', 'Please set interaction key.')
+            return
+        for key in self.session_keys:
+            image_store.release(key)
+        images = [{**image, 'key': image_store.acquire(Path(image['file']))}
+                  for image in checkpoint['schedule'][done:]]
+        self.session_keys = [image['key'] for image in images]
+        ShowWindow(
+            master=self,
+            images=images,
+            show_time=checkpoint['show_time'],
+            interval_time=checkpoint['interval_time'],
+            interaction_key=self.interaction_key_id,
+            skip_on_click=checkpoint['skip_on_click'],
+            screen=self.screen_(),
+            vsync=checkpoint['vsync'],
+            stream=checkpoint['stream'],
+            log=checkpoint['log'],
+            start=done,
+            seed=checkpoint.get('seed'))
+
     def startEvent(self, event: Any) -> None:
+        path = find_checkpoint()
+        if path is not None:
+            checkpoint = read_checkpoint(path)
+            done = log_progress(checkpoint['log'])
+            if self.resume_prompt(checkpoint, done):
+                self.resumeSession(checkpoint, done)
+                return
+            remove_checkpoint(checkpoint['log'])
         if self.validate_settings():
-            all_images = list(chain(*[group.images()
-                              for group in self.groups()]))
-            images = []
-            for image in SelectImages(**self.get_configs()).run():
-                images.append(
-                    next(filter(lambda i: i.id == image.id, all_images)))
+            configs = self.get_configs()
+            if configs['seed'] is None:
+                configs['seed'] = random.SystemRandom().randrange(2 ** 31)
+                schedule = generate_schedule(configs)
+            else:
+                schedule = schedule_cache.get(configs)
+            seed = configs['seed']
+            images = [{
+                'file': str(item.file),
+                'group_name': item.group_name(),
+                'key': item.key
+            } for item in (self.image_registry[id] for id in schedule)]
+            stream = stream_needed(images, self.screen_())
+            log = session_path()
             args = {
                 'master': self,
-                'images': [{
-                    'file': str(image.file),
-                    'group_name': image.group_name(),
-                    'pixmap': image.pixmap
-                } for image in images],
+                'images': images,
                 'show_time': self.show_time(),
                 'interval_time': self.interval_time(),
                 'interaction_key': self.interaction_key_id,
                 'skip_on_click': self.skip_on_click(),
-                'screen': self.screen_()
+                'screen': self.screen_(),
+                'vsync': self.vsync(),
+                'stream': STREAM_DEPTH if stream else 0,
+                'log': str(log),
+                'seed': seed
             }
+            write_checkpoint(log, {
+                'schedule': [{
+                    'file': image['file'],
+                    'group_name': image['group_name']
+                } for image in images],
+                **{key: args[key] for key in ('show_time', 'interval_time',
+                                              'skip_on_click', 'vsync',
+                                              'stream', 'seed')}
+            })
             ShowWindow(**args)
 
 
@@ -729,5 +999,5 @@ if __name__ == '__main__':
 # TODO: PERMITIR RATE = 0
 # TODO: JANELA DE MONITORAMENTO
 # TODO: DRAG SCROLL
-# TODO: FIX GUI FREEZING
+# TODO: FIX GUI FREEZING (IMPORTAÇÃO JÁ É FEITA EM SEGUNDO PLANO)
 # TODO: PARENTS
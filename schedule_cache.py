@@ -0,0 +1,61 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+from select_images import SelectImages
+from thumbnails import digest
+import numpy as np
+import json
+import os
+
+SCHEDULE_VERSION = 1
+SELECTION_KEYS = ('intergroup_show_order', 'intragroup_show_order',
+                  'intergroup_behaviour', 'selection_rate_behaviour',
+                  'allow_image_repeat', 'amount_of_exhibitions', 'seed')
+
+
+def schedule_key(configs: dict[str, Any]) -> str:
+    selection = {key: configs[key] for key in SELECTION_KEYS}
+    selection['groups'] = [
+        [str(id), group['rate'],
+         [[str(image_id), image['file'], image['rate']]
+          for image_id, image in group['images'].items()]]
+        for id, group in configs['groups'].items()
+    ]
+    selection['version'] = SCHEDULE_VERSION
+    return digest(json.dumps(selection, sort_keys=True))
+
+
+def generate_schedule(configs: dict[str, Any]) -> list[int]:
+    return [image.id for image in SelectImages(**configs).run()]
+
+
+class ScheduleCache:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def find(self, key: str) -> Path:
+        return self.path / f'{key}.npy'
+
+    def get(self, configs: dict[str, Any]) -> list[int]:
+        key = schedule_key(configs)
+        file = self.find(key)
+        try:
+            return np.load(file).tolist()
+        except (OSError, ValueError):
+            pass
+        schedule = generate_schedule(configs)
+        self.put(file, schedule)
+        return schedule
+
+    def put(self, file: Path, schedule: list[int]) -> None:
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp = file.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.array(schedule, dtype=np.int64))
+            os.replace(tmp, file)
+        except OSError:
+            pass
+
+
+schedule_cache = ScheduleCache(Path.home() / '.Stimulus' / 'schedules')
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import Optional
+from PyQt6 import QtCore, QtGui, QtWidgets
+import time
+
+
+class PresentationScheduler(QtCore.QObject):
+    def __init__(self, parent: Optional[QtCore.QObject] = None,
+                 spin_margin: int = 2_000_000) -> None:
+        super().__init__(parent)
+        self.spin_margin = spin_margin
+        self.interrupted = False
+        self.loop = QtCore.QEventLoop(self)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.loop.quit)
+
+    @staticmethod
+    def now() -> int:
+        return time.perf_counter_ns()
+
+    def wait_until(self, deadline: int) -> None:
+        self.interrupted = False
+        coarse = (deadline - self.spin_margin - self.now()) // 1_000_000
+        if coarse > 0:
+            self.timer.start(coarse)
+            self.loop.exec()
+            self.timer.stop()
+        while not self.interrupted and self.now() < deadline:
+            QtWidgets.QApplication.processEvents()
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+        self.loop.quit()
+
+
+class InputClock:
+    def __init__(self, resync: int = 1_000_000_000) -> None:
+        self.resync = resync
+        self.offset: Optional[int] = None
+
+    def map(self, event: QtGui.QInputEvent, now: int) -> int:
+        timestamp = event.timestamp()
+        if not timestamp:
+            return now
+        offset = now - timestamp * 1_000_000
+        if self.offset is None or offset < self.offset or \
+                offset - self.offset > self.resync:
+            self.offset = offset
+        return min(now, timestamp * 1_000_000 + self.offset)
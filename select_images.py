@@ -1,6 +1,7 @@
 import random
+import numpy as np
 from enum import Enum
-from typing import Any, Generator, Optional
+from typing import Any, Callable, Generator, Optional
 
 
 class Order(Enum):
@@ -19,28 +20,108 @@ class SelectionBehaviour(Enum):
     Probabilistic = 1
 
 
+class WeightTree:
+    def __init__(self, weights: list[float]) -> None:
+        self.weights = list(weights)
+        self.size = len(self.weights)
+        self.tree = [0.0] + self.weights
+        for i in range(1, self.size + 1):
+            j = i + (i & -i)
+            if j <= self.size:
+                self.tree[j] += self.tree[i]
+        self.step = 1 << self.size.bit_length() if self.size else 0
+
+    def update(self, index: int, weight: float) -> None:
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self) -> float:
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, x: float, strict: bool = True) -> int:
+        position = 0
+        step = self.step
+        while step:
+            i = position + step
+            if i <= self.size and (self.tree[i] <= x if strict else self.tree[i] < x):
+                position = i
+                x -= self.tree[i]
+            step >>= 1
+        return position
+
+    def choice(self, random_: Callable[[], float]) -> int:
+        total = self.total()
+        if total <= 0:
+            raise IndexError('Cannot choose from an empty population')
+        index = self.search(random_() * total)
+        if index == self.size:
+            index = self.search(total, strict=False)
+        return index
+
+
+class NextValid:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.parent = list(range(size + 1))
+
+    def remove(self, index: int) -> None:
+        self.parent[index] = index + 1
+
+    def find(self, index: int) -> int:
+        root = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+        return root
+
+    def after(self, index: int) -> int:
+        found = self.find(index + 1)
+        if found == self.size:
+            found = self.find(0)
+        if found == self.size:
+            raise IndexError('list index out of range')
+        return found
+
+
 class Image:
     def __init__(self, file: str, id: int, rate: int,
                  weight: Optional[int] = None,
-                 load: Optional[int] = None) -> None:
+                 load: Optional[int] = None, index: int = 0) -> None:
         self.file = file
         self.id = id
         self.rate = rate
         self.weight = weight
         self.load = load
+        self.index = index
 
 
 class Group:
     def __init__(self, name: str, images: list[dict[str, Any]], id: int,
                  rate: int, weight: Optional[int] = None,
-                 load: Optional[int] = None):
+                 load: Optional[int] = None, index: int = 0):
         self.name = name
-        self.images = [Image(**image) for image in images]
+        self.images = [Image(**image, index=n)
+                       for n, image in enumerate(images)]
         self.id = id
         self.rate = rate
         self.weight = weight
         self.load = load
+        self.index = index
         self.last_image = self.images[-1]
+        self.tree: Optional[WeightTree] = None
+        self.valid = NextValid(len(self.images))
 
 
 class SelectImages:
@@ -49,7 +130,9 @@ class SelectImages:
                  screen: Any, allow_image_repeat: bool,
                  amount_of_exhibitions: int, show_time: Any,
                  interval_time: Any, interaction_key: Any, skip_on_click: Any,
-                 groups: dict[int, Any], n: Any) -> None:
+                 groups: dict[int, Any], n: Any, vsync: Any = False,
+                 seed: Optional[int] = None) -> None:
+        self.random = random.Random(seed)
         _intergroup_show_order = Order[intergroup_show_order]
         _intragroup_show_order = Order[intragroup_show_order]
         _intergroup_behaviour = IntergroupBehaviour[intergroup_behaviour.replace(
@@ -67,7 +150,8 @@ class SelectImages:
                                for image in group['images']]
             for image, id_ in zip(group['images'], images_ids):
                 image['id'] = id_
-        self.groups = [Group(**group) for group in _groups]
+        self.groups = [Group(**group, index=n)
+                       for n, group in enumerate(_groups)]
         self.last_group = self.groups[-1]
         match _selection_rate_behaviour:
             case SelectionBehaviour.Deterministic:
@@ -82,18 +166,27 @@ class SelectImages:
                         image.load = image.rate * group_load_unity
                         image.weight = 1
                 self.reduce = self.reduce_load
-                self.valid_images = self.valid_images_deterministic
-                self.valid_groups = self.valid_groups_deterministic
+                self.weight = self.weight_deterministic
             case SelectionBehaviour.Probabilistic:
                 for group in self.groups:
                     group.weight = group.rate
                     for image in group.images:
                         image.weight = image.rate
                 self.reduce = self.dont_reduce_load
-                self.valid_images = self.valid_images_probabilistic
-                self.valid_groups = self.valid_groups_probabilistic
+                self.weight = self.weight_probabilistic
             case _:
                 raise Exception
+        for group in self.groups:
+            group.tree = WeightTree(
+                [self.weight(image) for image in group.images])
+        self.tree = WeightTree([self.weight(group) for group in self.groups])
+        self.valid = NextValid(len(self.groups))
+        for group in self.groups:
+            for image in group.images:
+                if not self.weight(image):
+                    group.valid.remove(image.index)
+            if not self.weight(group):
+                self.valid.remove(group.index)
         if _allow_image_repeat:
             self.repeating_behaviour = self.repeat
         else:
@@ -121,6 +214,22 @@ class SelectImages:
                 self.run = self.select_once_all_images_have_been_shown
             case _:
                 raise Exception
+        if (_selection_rate_behaviour == SelectionBehaviour.Probabilistic and
+                _allow_image_repeat and
+                _intergroup_show_order == Order.Random and
+                _intragroup_show_order == Order.Random and
+                _intergroup_behaviour == IntergroupBehaviour.Select_a_new_group_on_each_show):
+            self.run = self.select_independent
+        if (_selection_rate_behaviour == SelectionBehaviour.Deterministic and
+                _intergroup_behaviour != IntergroupBehaviour.Select_a_new_group_once_all_images_have_been_shown):
+            quotas = self.quotas(_allow_image_repeat)
+            if quotas is not None:
+                self.group_quotas, self.image_quotas = quotas
+                self.random_groups = _intergroup_show_order == Order.Random
+                self.random_images = _intragroup_show_order == Order.Random
+                self.blocks = _intergroup_behaviour == \
+                    IntergroupBehaviour.Select_a_new_group_on_depletion_of_the_current
+                self.run = self.select_quota
 
     @staticmethod
     def dont_repeat(image: Image) -> None:
@@ -132,18 +241,23 @@ class SelectImages:
         pass
 
     @staticmethod
-    def valid_images_probabilistic(group) -> list[Image]:
-        return [image for image in group.images if image.weight > 0]
-
-    def valid_groups_probabilistic(self) -> list[Group]:
-        return [group for group in self.groups if group.weight > 0]
+    def weight_probabilistic(item: Image | Group) -> float:
+        return item.weight if item.weight > 0 else 0
 
     @staticmethod
-    def valid_images_deterministic(group) -> list[Image]:
-        return [image for image in group.images if image.load > 0]
+    def weight_deterministic(item: Image | Group) -> float:
+        return item.weight if item.load > 0 else 0
 
-    def valid_groups_deterministic(self) -> list[Group]:
-        return [group for group in self.groups if group.load > 0]
+    def consume(self, group: Group, image: Image) -> None:
+        self.reduce(image)
+        self.repeating_behaviour(image)
+        self.reduce(group)
+        group.tree.update(image.index, self.weight(image))
+        self.tree.update(group.index, self.weight(group))
+        if not self.weight(image):
+            group.valid.remove(image.index)
+        if not self.weight(group):
+            self.valid.remove(group.index)
 
     @staticmethod
     def reduce_load(item) -> None:
@@ -154,71 +268,133 @@ class SelectImages:
         pass
 
     def random_image(self, group) -> Image:
-        images = self.valid_images(group)
-        image = random.choices(
-            images, weights=[image.weight for image in images])[0]
-        self.reduce(image)
-        self.repeating_behaviour(image)
-        self.reduce(group)
+        image = group.images[group.tree.choice(self.random.random)]
+        self.consume(group, image)
         return image
 
     def sequential_image(self, group) -> Image:
-        images = self.valid_images(group)
-        index = None
-        if group.last_image in images and images[images.index(group.last_image) + 1:]:
-            index = images.index(group.last_image) + 1
-        else:
-            for image in images:
-                if group.images.index(image) > group.images.index(group.last_image):
-                    index = images.index(image)
-                    break
-        if index is None:
-            index = 0
-        image = images[index]
+        image = group.images[group.valid.after(group.last_image.index)]
         group.last_image = image
-        self.reduce(image)
-        self.repeating_behaviour(image)
-        self.reduce(group)
+        self.consume(group, image)
         return image
 
     def random_group(self) -> Group:
-        groups = self.valid_groups()
-        group = random.choices(
-            groups, weights=[group.weight for group in groups])[0]
-        return group
+        return self.groups[self.tree.choice(self.random.random)]
 
     def sequential_group(self) -> Group:
-        groups = self.valid_groups()
-        index = None
-        if self.last_group in groups and groups[groups.index(self.last_group) + 1:]:
-            index = groups.index(self.last_group) + 1
-        else:
-            for group in groups:
-                if self.groups.index(group) > self.groups.index(self.last_group):
-                    index = groups.index(group)
-                    break
-        if index is None:
-            index = 0
-        group = groups[index]
+        group = self.groups[self.valid.after(self.last_group.index)]
         self.last_group = group
         return group
 
+    def last_valid_image(self, group: Group) -> Image:
+        total = group.tree.total()
+        if total <= 0:
+            raise IndexError('list index out of range')
+        return group.images[group.tree.search(total, strict=False)]
+
     def select_on_each_show(self) -> Generator[Image, None, None]:
         for _ in range(self.amount_of_exhibitions):
             yield self.next_image(self.next_group())
 
+    @staticmethod
+    def draw(rng: np.random.Generator, weights: np.ndarray,
+             size: int) -> np.ndarray:
+        cumulative = np.cumsum(weights, dtype=float)
+        indices = np.searchsorted(
+            cumulative, rng.random(size) * cumulative[-1], side='right')
+        return np.minimum(indices, np.flatnonzero(weights)[-1])
+
+    def select_independent(self, chunk: int = 4096) -> Generator[Image, None, None]:
+        rng = np.random.default_rng(self.random.getrandbits(128))
+        group_weights = np.array([group.weight for group in self.groups])
+        image_weights = [np.array([image.weight for image in group.images])
+                         for group in self.groups]
+        for start in range(0, self.amount_of_exhibitions, chunk):
+            size = min(chunk, self.amount_of_exhibitions - start)
+            groups = self.draw(rng, group_weights, size)
+            images = np.empty(size, dtype=int)
+            for n, weights in enumerate(image_weights):
+                mask = groups == n
+                images[mask] = self.draw(rng, weights, np.count_nonzero(mask))
+            for group, image in zip(groups.tolist(), images.tolist()):
+                yield self.groups[group].images[image]
+
+    def quotas(self, allow_image_repeat: bool) -> Optional[tuple[list[int], list[list[int]]]]:
+        group_quotas = []
+        image_quotas = []
+        for group in self.groups:
+            if not float(group.load).is_integer():
+                return None
+            if allow_image_repeat:
+                if not all(float(image.load).is_integer()
+                           for image in group.images):
+                    return None
+                quotas = [int(image.load) for image in group.images]
+                if sum(quotas) != group.load:
+                    return None
+            else:
+                if group.load > len(group.images):
+                    return None
+                quotas = [1] * len(group.images)
+            group_quotas.append(int(group.load))
+            image_quotas.append(quotas)
+        return group_quotas, image_quotas
+
+    @staticmethod
+    def round_robin(quotas: list[int], size: int) -> list[int]:
+        order = []
+        active = [n for n, quota in enumerate(quotas) if quota > 0]
+        round_ = 0
+        while active and len(order) < size:
+            order += active
+            round_ += 1
+            active = [n for n in active if quotas[n] > round_]
+        return order[:size]
+
+    def uniform_valid(self, quotas: list[int], size: int) -> list[int]:
+        remaining = list(quotas)
+        items = [n for n, quota in enumerate(quotas) if quota > 0]
+        order = []
+        for _ in range(size):
+            index = min(int(self.random.random() * len(items)), len(items) - 1)
+            item = items[index]
+            order.append(item)
+            remaining[item] -= 1
+            if not remaining[item]:
+                items[index] = items[-1]
+                items.pop()
+        return order
+
+    def select_quota(self) -> Generator[Image, None, None]:
+        if self.blocks:
+            groups = list(range(len(self.groups)))
+            if self.random_groups:
+                self.random.shuffle(groups)
+            groups = [n for n in groups for _ in range(self.group_quotas[n])]
+        elif self.random_groups:
+            groups = self.uniform_valid(self.group_quotas,
+                                        self.amount_of_exhibitions)
+        else:
+            groups = self.round_robin(self.group_quotas,
+                                      self.amount_of_exhibitions)
+        order = self.uniform_valid if self.random_images else self.round_robin
+        sequences = [iter(order(quotas, size)) for quotas, size
+                     in zip(self.image_quotas, self.group_quotas)]
+        for n in groups:
+            yield self.groups[n].images[next(sequences[n])]
+
     def select_once_all_images_have_been_shown(self) -> Generator[Image, None, None]:
         group = self.next_group()
         yield self.next_image(group)
         for _ in range(self.amount_of_exhibitions - 1):
-            if (group.last_image == group.images[-1] or
-                    group.images.index(group.last_image) > group.images.index(self.valid_images(group)[-1])):
+            if (group.last_image.index == len(group.images) - 1 or
+                    group.last_image.index > self.last_valid_image(group).index):
                 group = self.next_group()
             yield self.next_image(group)
 
     def select_on_depletion_of_the_current(self) -> Generator[Image, None, None]:
         group = self.next_group()
         for _ in range(self.amount_of_exhibitions):
-            if group not in self.valid_groups():
+            if not self.weight(group):
                 group = self.next_group()
             yield self.next_image(group)
@@ -1,18 +1,39 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Generator, Iterable, Optional
 from PyQt6 import QtGui, QtCore, QtWidgets
 from templates.Show.Show import Ui_MainWindow as Show
+from image_store import image_store
+from loader import ImageLoader, decode_frame
+from scheduler import InputClock, PresentationScheduler
+from vsync import FramePresenter, frame_count
+from timing import relative_timings
+from trial_log import TrialLog, read_log, remove_checkpoint, report_from_log, \
+    session_path
+from stream import FrameStream
+from compact_report import write_report
+from functools import partial
 from datetime import datetime
+from pathlib import Path
 import time
-import json
+
+STREAM_MEMORY = 1024 * 1024 * 1024
+STREAM_DEPTH = 8
+
+
+def stream_needed(images: list[dict[str, Any]], screen: str) -> bool:
+    size = next(filter(lambda x: x.name() == screen,
+                       QtWidgets.QApplication.screens())).size()
+    frames = len({image['key'] for image in images})
+    return frames * size.width() * size.height() * 4 > STREAM_MEMORY
 
 
 class ShowWindow(QtWidgets.QMainWindow, Show):
-    def __init__(self, master: Stimulus, images: list[dict[str, Any]],
+    def __init__(self, master: Stimulus, images: Iterable[dict[str, Any]],
                  show_time: int, interval_time: int,
                  interaction_key: QtCore.QPoint | QtCore.Qt.MouseButton | int,
-                 skip_on_click: bool, screen: str,
-                 parent: None = None) -> None:
+                 skip_on_click: bool, screen: str, vsync: bool = False,
+                 stream: int = 0, log: Optional[str] = None, start: int = 0,
+                 seed: Optional[int] = None, parent: None = None) -> None:
         super(ShowWindow, self).__init__(parent)
         self.setupUi(self)
         self.setWindowTitle("Show")
@@ -20,9 +41,19 @@ class ShowWindow(QtWidgets.QMainWindow, Show):
                             QtCore.Qt.WindowType.WindowStaysOnTopHint)
         self.showFullScreen()
         self.master = master
-        self.images = images
+        self.images = [] if stream else images
+        self.stream_depth = stream
+        self.stream = None
+        self.source = images
+        self.log_path = Path(log) if log else session_path()
+        self.start = start
+        self.seed = seed
         self.show_time = show_time / 1000
         self.interval_time = interval_time / 1000
+        self.show_time_ns = show_time * 1_000_000
+        self.interval_time_ns = interval_time * 1_000_000
+        self.scheduler = PresentationScheduler(self)
+        self.input_clock = InputClock()
         self.interaction_key = interaction_key
         self.screen_ = next(filter(lambda x: x.name() == screen,
                             QtWidgets.QApplication.screens()))
@@ -40,119 +71,339 @@ class ShowWindow(QtWidgets.QMainWindow, Show):
             self.interactionEvent = self.skipEvent
         else:
             self.interactionEvent = self._interactionEvent
-        self.times: list[float] = []
-        self.relative_times: list[float] = []
-        self.clicked_images: list[int] = []
+        self.response: dict[str, float] = {}
+        self.trial: dict[str, Any] = {}
+        self.timing: dict[str, Any] = {}
         self.clicked = False
         self.skip = False
+        self.interrupted = False
         self.running = False
+        self.prepared = False
         self.showing_image = False
         monitor = self.screen_.geometry()
         self.move(monitor.topLeft())
         self.resize(monitor.width(), monitor.height())
         self.setCursor(QtCore.Qt.CursorShape.BlankCursor)
         self.show()
+        self.prepare()
+        if not self.prepared:
+            return
+        self.presenter = None
+        self.vsync = vsync and self.setup_presenter()
+        if self.vsync:
+            self.present = self.present_frames
+            self.display = self.display_frames
+            self.frame_period = 1000 / self.refresh_rate
+            self.scheduled_show_time = self.show_frames * self.frame_period
+        else:
+            self.present = self.present_timed
+            self.display = self.display_timed
+            self.frame_period = 1000 / self.screen_.refreshRate()
+            self.scheduled_show_time = self.show_time * 1000
+
+    def setup_presenter(self) -> bool:
+        self.presenter = FramePresenter(self.frame)
+        self.gridLayout_2.replaceWidget(self.label, self.presenter)
+        self.label.hide()
+        self.presenter.show()
+        QtWidgets.QApplication.processEvents()
+        if not self.presenter.isValid():
+            self.gridLayout_2.replaceWidget(self.presenter, self.label)
+            self.presenter.deleteLater()
+            self.presenter = None
+            self.label.show()
+            return False
+        self.refresh_rate = self.screen_.refreshRate()
+        self.show_frames = frame_count(
+            round(self.show_time * 1000), self.refresh_rate, 1)
+        self.interval_frames = frame_count(
+            round(self.interval_time * 1000), self.refresh_rate)
+        return True
+
+    def prepare(self) -> None:
+        start = time.perf_counter()
+        self.label.setStyleSheet("background-color: black; color: white;")
+        if self.stream_depth:
+            failed = self.prepare_stream()
+        else:
+            failed = self.prepare_images()
+        self.label.setText('')
+        if failed:
+            self.abort(failed)
+            return
+        self.preparation_time = time.perf_counter() - start
+        self.prepared = True
+
+    def prepare_stream(self) -> list[str]:
+        self.stream = FrameStream(iter(self.source), self.screen_.size(),
+                                  self.stream_depth, self)
+        self.stream.loader.progress.connect(lambda count, total: self.label.setText(
+            f'Preparing stimuli {count}/{total}'))
+        self.stream.wait_ready()
+        return self.stream.failed()
+
+    def prepare_images(self) -> list[str]:
+        files = {image['key']: image['file'] for image in self.images}
+        keys = {files[key]: key for key in image_store.pending(list(files))}
+        if keys:
+            loader = ImageLoader(self, decode=partial(
+                decode_frame, size=self.screen_.size()))
+            loop = QtCore.QEventLoop(self)
+            loader.loaded.connect(lambda file, frame: image_store.insert_pixmap(
+                keys[file], QtGui.QPixmap.fromImage(frame)))
+            loader.progress.connect(lambda count, total: self.label.setText(
+                f'Preparing stimuli {count}/{total}'))
+            loader.finished.connect(loop.quit)
+            loader.load(list(keys))
+            if loader.running():
+                loop.exec()
+        for image in self.images:
+            image['pixmap'] = image_store.borrow(image['key'])
+        return sorted({image['file'] for image in self.images
+                       if image['pixmap'].isNull()})
+
+    def abort(self, files: list[str]) -> None:
+        QtWidgets.QMessageBox.warning(
+            self, 'Error', 'The following stimuli could not be loaded:\n' +
+            '\n'.join(files))
+        remove_checkpoint(self.log_path)
+        self.close()
+
+    def frames(self) -> Generator[dict[str, Any], None, None]:
+        if self.stream is None:
+            yield from self.images
+            return
+        while (image := self.stream.next()) is not None:
+            yield image
 
     def run(self) -> None:
         self.running = True
-        self.absolute_start_time = time.time()
-        for n, image in enumerate(self.images):
+        self.absolute_start_time = self.scheduler.now()
+        self.log = TrialLog(self.log_path)
+        self.log.write(self.session_record())
+        for n, image in enumerate(self.frames(), self.start):
             self.current_image = image
-            self.relative_start_time = time.time()
-            self.label.setPixmap(self.black_screen)
-            self.showing_image = False
-            while time.time() - self.relative_start_time < self.interval_time:
-                QtWidgets.QApplication.processEvents()
-            self.label.setPixmap(image['pixmap'].scaled(self.label.size(
-            ), QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation))
-            self.showing_image = True
-            while time.time() - self.relative_start_time < self.interval_time + self.show_time and not self.skip:
-                QtWidgets.QApplication.processEvents()
-            if self.clicked:
-                self.clicked_images.append(n)
+            self.present(image)
+            if self.interrupted and not self.showing_image:
+                break
+            self.timing['skipped'] = self.skip
+            self.trial = {
+                'type': 'trial',
+                'n': n,
+                'file': image['file'],
+                'group': image['group_name'],
+                'clicked': self.clicked,
+                **self.response
+            }
+            self.response = {}
             self.skip = False
             self.clicked = False
+            if self.interrupted:
+                break
+        self.end_trial(self.display(self.black_screen))
+        self.log.close()
         self.running = False
         self.close()
+        if self.interrupted:
+            return
+        remove_checkpoint(self.log.path)
+        self.report = report_from_log(read_log(self.log.path))
         self.showReportBox()
 
+    def session_record(self) -> dict[str, Any]:
+        record = {
+            'type': 'session',
+            'start': self.start,
+            'datetime': datetime.strftime(datetime.now(), '%d/%m/%Y %H:%M:%S'),
+            'show_time': self.show_time * 1000,
+            'interval_time': self.interval_time * 1000,
+            'preparation_time': self.preparation_time * 1000,
+            'vsync': self.vsync,
+            'seed': self.seed,
+            'frame_period': self.frame_period,
+            'scheduled_show_time': self.scheduled_show_time
+        }
+        if self.vsync:
+            record['refresh_rate'] = self.refresh_rate
+            record['show_frames'] = self.show_frames
+            record['interval_frames'] = self.interval_frames
+        return record
+
+    def end_trial(self, offset: int) -> None:
+        if self.timing and 'image_offset' not in self.timing:
+            self.timing['image_offset'] = offset
+            self.log_trial()
+
+    def log_trial(self) -> None:
+        timing = relative_timings([self.timing], self.absolute_start_time)[0]
+        record = {**self.trial, 'timing': timing}
+        if self.vsync:
+            record['flip'] = (timing['blank_onset'] / 1000,
+                              timing['image_onset'] / 1000)
+        self.log.write(record)
+
+    def display_timed(self, pixmap: QtGui.QPixmap) -> int:
+        self.label.setPixmap(pixmap)
+        self.label.repaint()
+        return self.scheduler.now()
+
+    def display_frames(self, pixmap: QtGui.QPixmap) -> int:
+        self.presenter.wait_frame(self.presenter.present(pixmap))
+        return self.presenter.last_flip
+
+    def present_timed(self, image: dict[str, Any]) -> None:
+        self.relative_start_time = self.scheduler.now()
+        self.showing_image = False
+        blank_onset = self.display_timed(self.black_screen)
+        self.end_trial(blank_onset)
+        image_scheduled = self.relative_start_time + self.interval_time_ns
+        self.scheduler.wait_until(image_scheduled)
+        if self.interrupted:
+            return
+        self.showing_image = True
+        self.image_start_time = self.display_timed(image['pixmap'])
+        self.timing = {
+            'blank_scheduled': self.relative_start_time,
+            'blank_onset': blank_onset,
+            'image_scheduled': image_scheduled,
+            'image_onset': self.image_start_time
+        }
+        if not self.skip:
+            self.scheduler.wait_until(
+                image_scheduled + self.show_time_ns)
+
+    def present_frames(self, image: dict[str, Any]) -> None:
+        self.relative_start_time = self.scheduler.now()
+        blank_scheduled = self.relative_start_time
+        self.showing_image = False
+        if self.interval_frames:
+            frame = self.presenter.present(self.black_screen)
+            self.presenter.wait_frame(frame)
+            self.relative_start_time = self.presenter.last_flip
+            self.end_trial(self.relative_start_time)
+            self.presenter.wait_frame(frame + self.interval_frames - 1)
+            if self.interrupted:
+                return
+        image_scheduled = self.relative_start_time + \
+            round(self.interval_frames * self.frame_period * 1e6)
+        frame = self.presenter.present(image['pixmap'])
+        self.image_start_time = self.scheduler.now()
+        self.showing_image = True
+        self.presenter.wait_frame(frame)
+        self.image_start_time = self.presenter.last_flip
+        self.end_trial(self.image_start_time)
+        self.timing = {
+            'blank_scheduled': blank_scheduled,
+            'blank_onset': self.relative_start_time,
+            'image_scheduled': image_scheduled,
+            'image_onset': self.image_start_time
+        }
+        if not self.skip:
+            self.presenter.wait_frame(frame + self.show_frames - 1)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        for image in self.images:
+            if image.pop('pixmap', None) is not None:
+                image_store.give_back(image['key'])
+        super().closeEvent(event)
+
+    def event(self, event: QtCore.QEvent) -> bool:
+        if isinstance(event, QtGui.QInputEvent):
+            self.input_clock.map(event, self.scheduler.now())
+            if self.running and event.type() == QtCore.QEvent.Type.KeyPress \
+                    and event.key() == QtCore.Qt.Key.Key_Escape:
+                self.interrupt()
+                return True
+        return super().event(event)
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+        self.skip = True
+        self.scheduler.interrupt()
+        if self.presenter is not None:
+            self.presenter.interrupt()
+
     def scrollInteractionEvent(self, event: QtGui.QWheelEvent) -> None:
         if event.angleDelta() == self.interaction_key:
             if self.showing_image:
-                self.interactionEvent()
+                self.interactionEvent(event)
                 return
-            elif not self.running:
+            elif not self.running and self.prepared:
                 self.run()
 
     def mouseInteractionEvent(self, event: QtGui.QMouseEvent) -> None:
         if event.button() == self.interaction_key:
             if self.showing_image:
-                self.interactionEvent()
-            elif not self.running:
+                self.interactionEvent(event)
+            elif not self.running and self.prepared:
                 self.run()
 
     def keyInteractionEvent(self, event: QtGui.QKeyEvent) -> None:
         if event.key() == self.interaction_key:
             if self.showing_image:
-                self.interactionEvent()
+                self.interactionEvent(event)
                 return
-            elif not self.running:
+            elif not self.running and self.prepared:
                 self.run()
 
-    def skipEvent(self) -> None:
+    def skipEvent(self, event: QtGui.QInputEvent) -> None:
         self.skip = True
-        self._interactionEvent()
+        self._interactionEvent(event)
+        self.scheduler.interrupt()
+        if self.presenter is not None:
+            self.presenter.interrupt()
 
-    def _interactionEvent(self) -> None:
+    def _interactionEvent(self, event: QtGui.QInputEvent) -> None:
         if not self.clicked:
-            now = time.time()
-            self.times.append(now - self.absolute_start_time)
-            self.relative_times.append(
-                now - self.relative_start_time - self.interval_time)
+            now = self.scheduler.now()
+            time_ = self.input_clock.map(event, now)
+            self.response = {
+                'time': (time_ - self.absolute_start_time) / 1e9,
+                'relative_time': (time_ - self.image_start_time) / 1e9,
+                'raw_time': (now - self.absolute_start_time) / 1e9,
+                'raw_relative_time': (now - self.image_start_time) / 1e9,
+                'input_delay': (now - time_) / 1e6
+            }
             self.clicked = True
 
     def get_report(self) -> dict[str, Any]:
-        report = {
-            'id': self.id,
-            'images': [
-                {
-                    'file': image['file'],
-                    'group': image['group_name'],
-                }
-                for image in self.images
-            ],
-            'times': self.times,
-            'relative_times': self.relative_times,
-            'clicked_images': self.clicked_images,
-            'datetime': datetime.strftime(datetime.now(), '%d/%m/%Y %H:%M:%S'),
-            'show_time': self.show_time * 1000,
-            'interval_time': self.interval_time * 1000
-        }
-        return report
+        return {'id': self.id, **self.report}
 
     def showReportBox(self) -> None:
         report_box = QtWidgets.QMessageBox()
         report_box.setWindowTitle("Report")
-        groups = set([image['group_name'] for image in self.images])
+        images = self.report['images']
+        clicked_images = self.report['clicked_images']
+        groups = set([image['group'] for image in images])
         groups_count = dict()
         for group in groups:
             groups_count[group] = 0
-        for image in self.images:
-            groups_count[image['group_name']] += 1
+        for image in images:
+            groups_count[image['group']] += 1
         clicked_groups_counts = dict()
         for group in groups:
             clicked_groups_counts[group] = 0
-        for index in self.clicked_images:
-            clicked_groups_counts[self.images[index]['group_name']] += 1
-        image_ps = 'image was' if len(self.images) == 1 else 'images were'
-        text = f"{len(self.images)} {image_ps} were exhibited of which\n"
+        for index in clicked_images:
+            clicked_groups_counts[images[index]['group']] += 1
+        image_ps = 'image was' if len(images) == 1 else 'images were'
+        text = f"{len(images)} {image_ps} were exhibited of which\n"
         for group in groups:
             group_count_ps = 'was' if groups_count[group] == 1 else 'were'
             text += f'{groups_count[group]} {group_count_ps} from the group {group}\n'
-        text += f"{len(self.clicked_images)} images were interacted of which\n"
+        text += f"{len(clicked_images)} images were interacted of which\n"
         for group in groups:
             group_clicked_ps = 'was' if clicked_groups_counts[group] == 1 else 'were'
             text += f'{clicked_groups_counts[group]} {group_clicked_ps} from the group {group}\n'
+        text += f'Stimuli were prepared in {self.preparation_time * 1000:.0f} ms\n'
+        summary = self.report['timing_summary']
+        if summary:
+            text += (f"Onset jitter: mean {summary['onset_jitter_mean']:.2f} ms, "
+                     f"p95 {summary['onset_jitter_p95']:.2f} ms, "
+                     f"max {summary['onset_jitter_max']:.2f} ms\n")
+            late_ps = 'frame' if summary['late_frames'] == 1 else 'frames'
+            text += f"{summary['late_frames']} late {late_ps}\n"
         report_box.setText(text)
         report_box.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Save |
                                       QtWidgets.QMessageBox.StandardButton.Discard)
@@ -163,11 +414,12 @@ class ShowWindow(QtWidgets.QMainWindow, Show):
             pass
 
     def save_report(self) -> None:
-        path = QtWidgets.QFileDialog.getSaveFileName(
-            self, 'Save Data Report', '', 'JSON (*.json)')[0]
+        path, filter_ = QtWidgets.QFileDialog.getSaveFileName(
+            self, 'Save Data Report', '',
+            'JSON (*.json);;Compact report (*.npz)')
         if path:
             self.id = path.split('/')[-1].split('.')[0]
-            if not path.endswith('.json'):
-                path += '.json'
-            with open(path, 'w') as f:
-                json.dump(self.get_report(), f, indent=4)
+            suffix = '.npz' if filter_.endswith('(*.npz)') else '.json'
+            if not path.endswith(suffix):
+                path += suffix
+            write_report(Path(path), self.get_report())
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from collections import deque
+from functools import partial
+from typing import Any, Iterator, Optional
+from PyQt6 import QtCore, QtGui
+from image_store import image_store
+from loader import ImageLoader, decode_frame
+
+
+class FrameStream(QtCore.QObject):
+    def __init__(self, images: Iterator[dict[str, Any]], size: QtCore.QSize,
+                 depth: int = 8,
+                 parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.images = images
+        self.depth = depth
+        self.window: deque[dict[str, Any]] = deque()
+        self.loading: dict[str, str] = {}
+        self.current: Optional[dict[str, Any]] = None
+        self.loop = QtCore.QEventLoop(self)
+        self.loader = ImageLoader(self, decode=partial(decode_frame, size=size))
+        self.loader.loaded.connect(self._loaded)
+        self.loader.finished.connect(self.loop.quit)
+        self.fill()
+
+    def fill(self) -> None:
+        while len(self.window) < self.depth:
+            image = next(self.images, None)
+            if image is None:
+                return
+            self.window.append(image)
+            if image['key'] in image_store.pixmaps:
+                image['pixmap'] = image_store.borrow(image['key'])
+            elif image['file'] not in self.loading:
+                self.loading[image['file']] = image['key']
+                self.loader.load([image['file']])
+
+    def failed(self) -> list[str]:
+        return sorted({image['file'] for image in self.window
+                       if 'pixmap' not in image or image['pixmap'].isNull()})
+
+    def ready(self) -> bool:
+        return all('pixmap' in image for image in self.window)
+
+    def wait_ready(self) -> None:
+        while not self.ready() and self.loader.running():
+            self.loop.exec()
+
+    def next(self) -> Optional[dict[str, Any]]:
+        if not self.window:
+            self.release(self.current)
+            self.current = None
+            return None
+        image = self.window[0]
+        while 'pixmap' not in image and self.loader.running():
+            self.loop.exec()
+        if 'pixmap' not in image:
+            self.loading.pop(image['file'], None)
+            image['pixmap'] = image_store.borrow(image['key'])
+        self.window.popleft()
+        self.release(self.current)
+        self.current = image
+        self.fill()
+        return image
+
+    @staticmethod
+    def release(image: Optional[dict[str, Any]]) -> None:
+        if image is not None and image.pop('pixmap', None) is not None:
+            image_store.give_back(image['key'])
+
+    def close(self) -> None:
+        self.loader.cancel()
+        self.release(self.current)
+        self.current = None
+        for image in self.window:
+            self.release(image)
+        self.window.clear()
+
+    def _loaded(self, file: str, frame: QtGui.QImage) -> None:
+        key = self.loading.pop(file, None)
+        if key is None:
+            return
+        image_store.insert_pixmap(key, QtGui.QPixmap.fromImage(frame))
+        for image in self.window:
+            if image['key'] == key and 'pixmap' not in image:
+                image['pixmap'] = image_store.borrow(key)
+        if key not in image_store.pixmap_counts:
+            image_store.pixmaps.pop(key, None)
+        if self.window and 'pixmap' in self.window[0]:
+            self.loop.quit()
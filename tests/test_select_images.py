@@ -0,0 +1,106 @@
+from __future__ import annotations
+from collections import Counter
+from itertools import groupby
+from typing import Any
+import random
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from select_images import SelectImages  # noqa: E402
+
+EACH_SHOW = 'Select a new group on each show'
+DEPLETION = 'Select a new group on depletion\nof the current'
+
+
+def make_configs(rng: random.Random) -> dict[str, Any]:
+    repeat = rng.random() < 0.5
+    groups = {}
+    id = 0
+    for n in range(rng.randint(1, 4)):
+        images = {}
+        for _ in range(rng.randint(1, 6)):
+            images[id] = {'file': f'{id}.png',
+                          'rate': rng.randint(1, 3) if repeat else 1}
+            id += 1
+        groups[n] = {'name': str(n), 'rate': rng.randint(1, 3),
+                     'images': images}
+    rate = sum(group['rate'] for group in groups.values())
+    return {
+        'intergroup_show_order': rng.choice(['Random', 'Sequential']),
+        'intragroup_show_order': rng.choice(['Random', 'Sequential']),
+        'intergroup_behaviour': rng.choice([EACH_SHOW, DEPLETION]),
+        'selection_rate_behaviour': 'Deterministic',
+        'screen': None,
+        'allow_image_repeat': repeat,
+        'amount_of_exhibitions': rate * rng.randint(1, 12),
+        'show_time': None,
+        'interval_time': None,
+        'interaction_key': None,
+        'skip_on_click': False,
+        'groups': groups,
+        'n': id,
+        'seed': rng.randrange(2 ** 31)
+    }
+
+
+def step_by_step(configs: dict[str, Any]) -> list[int]:
+    selector = SelectImages(**configs)
+    if configs['intergroup_behaviour'] == EACH_SHOW:
+        run = selector.select_on_each_show
+    else:
+        run = selector.select_on_depletion_of_the_current
+    return [image.id for image in run()]
+
+
+def quota(configs: dict[str, Any]) -> list[int]:
+    return [image.id for image in SelectImages(**configs).run()]
+
+
+def rebuild(configs: dict[str, Any]) -> dict[str, Any]:
+    return {**configs, 'groups': {
+        id: {**group, 'images': dict(group['images'])}
+        for id, group in configs['groups'].items()}}
+
+
+def quota_configs(rng: random.Random) -> dict[str, Any]:
+    while True:
+        configs = make_configs(rng)
+        selector = SelectImages(**rebuild(configs))
+        if selector.run == selector.select_quota:
+            return configs
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_select_quota_matches_step_by_step(seed: int) -> None:
+    configs = quota_configs(random.Random(seed))
+    group_of = {image: id for id, group in configs['groups'].items()
+                for image in group['images']}
+    expected = step_by_step(rebuild(configs))
+    actual = quota(rebuild(configs))
+    assert len(actual) == len(expected)
+    random_groups = configs['intergroup_show_order'] == 'Random'
+    random_images = configs['intragroup_show_order'] == 'Random'
+    if configs['allow_image_repeat'] or not random_images:
+        assert Counter(actual) == Counter(expected)
+    else:
+        assert len(set(actual)) == len(actual)
+        assert Counter(group_of[id] for id in actual) == \
+            Counter(group_of[id] for id in expected)
+    if not random_groups and not random_images:
+        assert actual == expected
+    if not random_images:
+        for group in configs['groups']:
+            assert [id for id in actual if group_of[id] == group] == \
+                [id for id in expected if group_of[id] == group]
+    if not random_groups and configs['intergroup_behaviour'] == EACH_SHOW:
+        assert [group_of[id] for id in actual] == \
+            [group_of[id] for id in expected]
+    if configs['intergroup_behaviour'] == DEPLETION:
+        blocks = [group for group, _ in groupby(group_of[id] for id in actual)]
+        assert len(blocks) == len(set(blocks))
+        if not random_groups:
+            assert blocks == sorted(blocks)
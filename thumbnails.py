@@ -0,0 +1,106 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+from PyQt6 import QtCore, QtGui
+from hashlib import blake2b
+from threading import Lock
+import os
+
+
+THUMBNAIL_SIZE = QtCore.QSize(150, 150)
+
+
+def digest(text: str) -> str:
+    return blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def file_key(file: Path) -> tuple[str, str]:
+    file = Path(file).resolve()
+    stat = file.stat()
+    return digest(str(file)), digest(f'{stat.st_mtime_ns}:{stat.st_size}')
+
+
+def make_thumbnail(image: QtGui.QImage) -> QtGui.QImage:
+    return image.scaled(THUMBNAIL_SIZE,
+                        QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                        QtCore.Qt.TransformationMode.SmoothTransformation)
+
+
+class ThumbnailCache:
+    def __init__(self, path: Path, max_size: int = 256 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.size: Optional[int] = None
+        self.lock = Lock()
+
+    def entries(self, prefix: str = '') -> list[os.DirEntry]:
+        if not os.path.isdir(self.path):
+            return []
+        with os.scandir(self.path) as it:
+            return [entry for entry in it
+                    if entry.is_file() and entry.name.startswith(prefix)]
+
+    def find(self, file_key: str, signature: str) -> Optional[Path]:
+        for extension in ('.jpg', '.png'):
+            path = self.path / f'{file_key}-{signature}{extension}'
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get(self, file: Path) -> Optional[QtGui.QImage]:
+        try:
+            path = self.find(*file_key(file))
+        except OSError:
+            return None
+        if path is None:
+            return None
+        image = QtGui.QImage(str(path))
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def put(self, file: Path, thumbnail: QtGui.QImage) -> None:
+        try:
+            path_key, signature = file_key(file)
+        except OSError:
+            return
+        if thumbnail.hasAlphaChannel():
+            extension, format, quality = '.png', 'PNG', -1
+        else:
+            extension, format, quality = '.jpg', 'JPG', 85
+        path = self.path / f'{path_key}-{signature}{extension}'
+        with self.lock:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                if self.size is None:
+                    self.size = sum(entry.stat().st_size
+                                    for entry in self.entries())
+                for entry in self.entries(path_key):
+                    self.size -= entry.stat().st_size
+                    os.remove(entry.path)
+                tmp = path.with_suffix('.tmp')
+                if not thumbnail.save(str(tmp), format, quality):
+                    return
+                os.replace(tmp, path)
+                self.size += os.path.getsize(path)
+                if self.size > self.max_size:
+                    self.evict()
+            except OSError:
+                self.size = None
+
+    def evict(self) -> None:
+        entries = sorted(self.entries(),
+                         key=lambda entry: entry.stat().st_mtime_ns)
+        target = self.max_size * 0.9
+        for entry in entries:
+            if self.size <= target:
+                break
+            self.size -= entry.stat().st_size
+            os.remove(entry.path)
+
+
+thumbnail_cache = ThumbnailCache(Path.home() / '.Stimulus' / 'cache')
@@ -0,0 +1,47 @@
+from __future__ import annotations
+from typing import Any
+import numpy as np
+
+
+TIMESTAMPS = ('blank_scheduled', 'blank_onset', 'image_scheduled',
+              'image_onset', 'image_offset')
+
+
+def relative_timings(timings: list[dict[str, Any]],
+                     start: int) -> list[dict[str, Any]]:
+    trials = []
+    for timing in timings:
+        trial = {key: (timing[key] - start) / 1e6
+                 for key in TIMESTAMPS if key in timing}
+        if 'image_offset' in trial:
+            trial['duration'] = trial['image_offset'] - trial['image_onset']
+        trial['skipped'] = timing.get('skipped', False)
+        trials.append(trial)
+    return trials
+
+
+def timing_summary(trials: list[dict[str, Any]], show_time: float,
+                   frame_period: float) -> dict[str, Any]:
+    if not trials:
+        return {}
+    onset_jitter = np.array([trial['image_onset'] - trial['image_scheduled']
+                             for trial in trials])
+    blank_jitter = np.array([trial['blank_onset'] - trial['blank_scheduled']
+                             for trial in trials])
+    durations = np.array([trial['duration'] for trial in trials
+                          if 'duration' in trial and not trial['skipped']])
+    duration_error = np.abs(durations - show_time)
+    summary = {
+        'frame_period': frame_period,
+        'onset_jitter_mean': float(np.mean(np.abs(onset_jitter))),
+        'onset_jitter_p95': float(np.percentile(np.abs(onset_jitter), 95)),
+        'onset_jitter_max': float(np.max(np.abs(onset_jitter))),
+        'blank_jitter_mean': float(np.mean(np.abs(blank_jitter))),
+        'blank_jitter_max': float(np.max(np.abs(blank_jitter))),
+        'late_frames': int(np.sum(onset_jitter > frame_period)),
+    }
+    if durations.size:
+        summary['duration_mean'] = float(np.mean(durations))
+        summary['duration_error_mean'] = float(np.mean(duration_error))
+        summary['duration_error_max'] = float(np.max(duration_error))
+    return summary
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+from timing import timing_summary
+import threading
+import queue
+import json
+import os
+
+SESSIONS_DIR = Path.home() / '.Stimulus' / 'sessions'
+
+
+def session_path(date: Optional[datetime] = None) -> Path:
+    date = date or datetime.now()
+    return SESSIONS_DIR / f"{date.strftime('%Y%m%d-%H%M%S-%f')}.jsonl"
+
+
+def checkpoint_path(log: Path) -> Path:
+    return Path(log).with_suffix('.checkpoint.json')
+
+
+def write_checkpoint(log: Path, checkpoint: dict[str, Any]) -> Path:
+    path = checkpoint_path(log)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'log': str(log), **checkpoint}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def read_checkpoint(path: Path) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_checkpoint() -> Optional[Path]:
+    if not SESSIONS_DIR.is_dir():
+        return None
+    return max(SESSIONS_DIR.glob('*.checkpoint.json'), default=None)
+
+
+def remove_checkpoint(log: Path) -> None:
+    try:
+        os.remove(checkpoint_path(log))
+    except FileNotFoundError:
+        pass
+
+
+def log_progress(log: Path) -> int:
+    try:
+        return sum(record['type'] == 'trial' for record in read_log(log))
+    except FileNotFoundError:
+        return 0
+
+
+class TrialLog:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.terminate()
+        self.queue: queue.SimpleQueue[Optional[dict[str, Any]]] = \
+            queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._write, daemon=True)
+        self.thread.start()
+
+    def terminate(self) -> None:
+        try:
+            with open(self.path, 'rb+') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        except FileNotFoundError:
+            pass
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.queue.put(record)
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _write(self) -> None:
+        with open(self.path, 'a', buffering=1) as f:
+            while (record := self.queue.get()) is not None:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_log(path: Path) -> list[dict[str, Any]]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def report_from_log(records: list[dict[str, Any]]) -> dict[str, Any]:
+    sessions = [record for record in records if record['type'] == 'session']
+    session = sessions[0]
+    trials = [record for record in records if record['type'] == 'trial']
+    clicked = [trial for trial in trials if trial['clicked']]
+    timings = [trial['timing'] for trial in trials]
+    report = {
+        'images': [
+            {
+                'file': trial['file'],
+                'group': trial['group'],
+            }
+            for trial in trials
+        ],
+        'times': [trial['time'] for trial in clicked],
+        'relative_times': [trial['relative_time'] for trial in clicked],
+        'raw_times': [trial['raw_time'] for trial in clicked],
+        'raw_relative_times': [trial['raw_relative_time'] for trial in clicked],
+        'input_delays': [trial['input_delay'] for trial in clicked],
+        'clicked_images': [trial['n'] for trial in clicked],
+        'datetime': session['datetime'],
+        'show_time': session['show_time'],
+        'interval_time': session['interval_time'],
+        'preparation_time': session['preparation_time'],
+        'vsync': session['vsync'],
+        'seed': session.get('seed'),
+        'timings': timings,
+        'timing_summary': timing_summary(timings,
+                                         session['scheduled_show_time'],
+                                         session['frame_period'])
+    }
+    if session['vsync']:
+        report['refresh_rate'] = session['refresh_rate']
+        report['show_frames'] = session['show_frames']
+        report['interval_frames'] = session['interval_frames']
+        report['flip_times'] = [trial.get('flip') for trial in trials]
+    if len(sessions) > 1:
+        report['segments'] = [
+            {
+                'start': session.get('start', 0),
+                'datetime': session['datetime'],
+                'preparation_time': session['preparation_time']
+            }
+            for session in sessions
+        ]
+    return report
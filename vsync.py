@@ -0,0 +1,57 @@
+from __future__ import annotations
+from typing import Optional
+from PyQt6 import QtCore, QtGui, QtWidgets, QtOpenGLWidgets
+import time
+
+
+def frame_count(duration: int, refresh_rate: float, minimum: int = 0) -> int:
+    return max(minimum, round(duration * refresh_rate / 1000))
+
+
+class FramePresenter(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        surface_format = QtGui.QSurfaceFormat.defaultFormat()
+        surface_format.setSwapInterval(1)
+        self.setFormat(surface_format)
+        self.setUpdateBehavior(
+            QtOpenGLWidgets.QOpenGLWidget.UpdateBehavior.NoPartialUpdate)
+        self.pixmap: Optional[QtGui.QPixmap] = None
+        self.frames = 0
+        self.last_flip = 0
+        self.target = 0
+        self.interrupted = False
+        self.loop = QtCore.QEventLoop(self)
+        self.frameSwapped.connect(self.swapped)
+
+    def paintGL(self) -> None:
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtCore.Qt.GlobalColor.black)
+        if self.pixmap is not None:
+            rect = QtCore.QRect(QtCore.QPoint(0, 0),
+                                self.pixmap.deviceIndependentSize().toSize())
+            rect.moveCenter(self.rect().center())
+            painter.drawPixmap(rect, self.pixmap)
+        painter.end()
+
+    def swapped(self) -> None:
+        self.last_flip = time.perf_counter_ns()
+        self.frames += 1
+        if self.frames >= self.target:
+            self.loop.quit()
+        self.update()
+
+    def present(self, pixmap: QtGui.QPixmap) -> int:
+        self.pixmap = pixmap
+        self.update()
+        return self.frames + 1
+
+    def wait_frame(self, frame: int) -> None:
+        self.interrupted = False
+        self.target = frame
+        if self.frames < frame:
+            self.loop.exec()
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+        self.loop.quit()